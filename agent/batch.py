@@ -0,0 +1,78 @@
+import asyncio
+
+from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from agent.streaming import format_sse
+from prompt.prompt import AnswerQueryTool
+from toolkit.registry import registry
+from toolkit.tools import format_context
+
+
+async def embed_questions(embeddings, questions: list[str]) -> list[list[float]]:
+    """
+    Embed all questions in one call when the embeddings support it, else concurrently one by one.
+    """
+    if hasattr(embeddings, "embed_queries"):
+        return await asyncio.to_thread(embeddings.embed_queries, questions)
+    return await asyncio.gather(*(embeddings.aembed_query(question) for question in questions))
+
+
+async def retrieve_context(questions: list[str], max_concurrency: int) -> list[str]:
+    """
+    Retrieve and pack the context of every question with the registry retriever, exactly
+    as answer_query_tool does, with at most max_concurrency searches in flight.
+
+    The retriever embeds each question again; with the embedding cache on, that is served
+    from the query vectors embed_questions() just stored.
+    """
+    results = await registry.get_retriever().abatch(questions, {"max_concurrency": max_concurrency})
+    return [format_context(docs) for docs in results]
+
+
+async def stream_batch_answers(service, questions: list[str], max_concurrency: int):
+    """
+    Answer many questions and yield an SSE "answer" event for each one as soon as it is ready.
+
+    Questions found in the semantic answer cache are sent first. The rest are embedded in one
+    call, retrieved concurrently and answered through chain.abatch_as_completed with at most
+    max_concurrency LLM calls in flight. Events:
+    - answer: {"index", "question", "answer", "cached"}
+    - error: {"index", "question", "error"} for one question, or {"error"} when the batch failed
+    - done: {"answered", "failed"}
+    """
+    answered = failed = 0
+    try:
+        cache = service.answer_cache
+        version = cache.version if cache is not None else None
+        vectors = await embed_questions(service.embeddings, questions)
+
+        pending = []
+        for index, (question, vector) in enumerate(zip(questions, vectors)):
+            cached = cache.lookup(question, vector) if cache is not None else None
+            if cached is not None:
+                answered += 1
+                yield format_sse("answer", {"index": index, "question": question, "answer": cached, "cached": True})
+            else:
+                pending.append(index)
+
+        if pending:
+            contexts = await retrieve_context([questions[index] for index in pending], max_concurrency)
+            chain = PromptTemplate.from_template(AnswerQueryTool) | service.llm | StrOutputParser()
+            inputs = [{"context": context, "question": questions[index]} for index, context in zip(pending, contexts)]
+            async for position, result in chain.abatch_as_completed(
+                inputs, {"max_concurrency": max_concurrency}, return_exceptions=True
+            ):
+                index = pending[position]
+                question = questions[index]
+                if isinstance(result, Exception):
+                    failed += 1
+                    yield format_sse("error", {"index": index, "question": question, "error": str(result)})
+                    continue
+                answered += 1
+                service.remember_answer(question, vectors[index], result, version)
+                yield format_sse("answer", {"index": index, "question": question, "answer": result, "cached": False})
+
+        yield format_sse("done", {"answered": answered, "failed": failed})
+    except Exception as e:
+        yield format_sse("error", {"error": str(e)})
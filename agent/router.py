@@ -0,0 +1,166 @@
+import re
+from uuid import uuid4
+
+import numpy as np
+from langchain_core.messages import AIMessage
+
+from utils.keyword_index import tokenize
+
+# Keyword rules per tool. A question is routed only when exactly one tool's rules match.
+ROUTING_RULES = {
+    "generate_important_questions_tool": [
+        r"\b(important|exam|board|practice|sample|possible|expected)[\w\s-]{0,20}\b(questions?|mcqs?)\b",
+        r"\b(generate|make|create|prepare|write|give me|list)\b[\w\s-]{0,30}\b(questions?|mcqs?|quiz|test)\b",
+    ],
+    "summarize_chapter_tool": [
+        r"\b(summari[sz]e|summary|recap|overview|outline)\b",
+        r"\bkey (points|concepts|formulas)\b",
+    ],
+    "answer_query_tool": [
+        r"^\s*(explain|define|describe|derive|calculate|find|state|differentiate|compare)\b",
+        r"\b(what is|what are|meaning of|definition of|difference between)\b",
+    ],
+}
+
+# Any wh-question, including small talk ("How are you?"). Routed to answer_query_tool only
+# when it has a subject and the embedding classifier (if enabled) ranks that tool first by min_margin.
+WEAK_ANSWER_RULE = r"^\s*(what|why|how|when|where|which|who)\b"
+
+# Words that address the bot rather than name a subject; a question made only of these
+# and stopwords is small talk and is left to the LLM
+CHAT_WORDS = {
+    "about", "can", "could", "did", "do", "does", "doing", "going", "hello", "hey", "hi", "i", "me", "my",
+    "name", "now", "there", "today", "up", "us", "we", "where", "who", "why", "you", "your", "yours",
+}
+
+# Example questions per tool for the embedding classifier
+ROUTING_EXAMPLES = {
+    "answer_query_tool": [
+        "What is velocity?",
+        "Explain Newton's second law of motion.",
+        "How does a convex lens form an image?",
+        "Define work and give its SI unit.",
+        "What is the difference between speed and velocity?",
+    ],
+    "generate_important_questions_tool": [
+        "Give me important questions from the chapter on electricity.",
+        "Make a practice test on kinematics.",
+        "Which questions can come in the board exam from waves?",
+        "Create MCQs about thermodynamics.",
+    ],
+    "summarize_chapter_tool": [
+        "Summarize the chapter on magnetism.",
+        "Give me the key points and formulas of chapter 3.",
+        "Quick overview of the force and motion chapter.",
+        "Recap the main ideas of simple harmonic motion.",
+    ],
+}
+
+
+class IntentRouter:
+    """
+    Picks the tool for clear-cut questions without an LLM call.
+
+    Keyword rules are tried first. When they match no tool or several, the optional
+    embedding classifier compares the question with the example questions of each tool
+    and routes when the best tool is both similar enough and ahead of the runner-up.
+    A bare wh-question is only routed when the classifier agrees, and questions without a
+    subject ("Who are you?") never go to retrieval by rule. Anything still unclear returns
+    None and is left to the LLM router.
+    """
+
+    def __init__(self, embeddings=None, similarity_threshold: float = 0.75, min_margin: float = 0.05):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.min_margin = min_margin
+        self.rules = {
+            tool: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+            for tool, patterns in ROUTING_RULES.items()
+        }
+        self.weak_answer_rule = re.compile(WEAK_ANSWER_RULE, re.IGNORECASE)
+        self._centroids = None
+        self.stats = {"rules": 0, "embeddings": 0, "llm": 0}
+
+    @staticmethod
+    def has_subject(question: str) -> bool:
+        """
+        True when the question names something to look up, not only the bot or the conversation.
+        """
+        return any(term not in CHAT_WORDS for term in tokenize(question))
+
+    def route_by_rules(self, question: str) -> str:
+        matches = [tool for tool, patterns in self.rules.items() if any(p.search(question) for p in patterns)]
+        # Asking for questions or a summary usually starts with "what"/"give", so those win over answering
+        specific = [tool for tool in matches if tool != "answer_query_tool"]
+        if len(specific) == 1:
+            return specific[0]
+        if not specific and matches and self.has_subject(question):
+            return "answer_query_tool"
+        return None
+
+    async def _get_centroids(self) -> dict:
+        if self._centroids is None:
+            centroids = {}
+            for tool, examples in ROUTING_EXAMPLES.items():
+                vectors = np.asarray(await self.embeddings.aembed_documents(examples), dtype=np.float32)
+                centroid = vectors.mean(axis=0)
+                centroids[tool] = centroid / np.linalg.norm(centroid)
+            self._centroids = centroids
+        return self._centroids
+
+    async def _embedding_scores(self, question: str) -> list:
+        """
+        :return: [(cosine similarity, tool)] for every tool, best first.
+        """
+        centroids = await self._get_centroids()
+        vector = np.asarray(await self.embeddings.aembed_query(question), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        return sorted(((float(centroid @ vector), tool) for tool, centroid in centroids.items()), reverse=True)
+
+    async def route_by_embeddings(self, question: str, weak_tool: str = None) -> str:
+        """
+        :param weak_tool: Tool a weak rule suggested; it only needs to rank first by min_margin.
+        """
+        scores = await self._embedding_scores(question)
+        (best_score, best_tool), (runner_up, _) = scores[0], scores[1]
+        if best_score - runner_up < self.min_margin:
+            return None
+        if best_score >= self.similarity_threshold or best_tool == weak_tool:
+            return best_tool
+        return None
+
+    async def route(self, question: str) -> str:
+        """
+        :return: Name of the tool to call, or None to let the LLM decide.
+        """
+        tool = self.route_by_rules(question)
+        if tool is not None:
+            self.stats["rules"] += 1
+            return tool
+        weak = bool(self.weak_answer_rule.search(question)) and self.has_subject(question)
+        if self.embeddings is not None:
+            tool = await self.route_by_embeddings(question, "answer_query_tool" if weak else None)
+            if tool == "answer_query_tool" and not self.has_subject(question):
+                tool = None
+            if tool is not None:
+                self.stats["embeddings"] += 1
+                return tool
+        elif weak:
+            # Without the classifier, a wh-question about a subject is the best evidence there is
+            self.stats["rules"] += 1
+            return "answer_query_tool"
+        self.stats["llm"] += 1
+        return None
+
+    def get_stats(self) -> dict:
+        return dict(self.stats)
+
+
+def make_tool_call(tool: str, question: str) -> AIMessage:
+    """
+    AIMessage that asks ToolNode to run `tool` on the question, as if the LLM had chosen it.
+    """
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": tool, "args": {"question": question}, "id": f"route_{uuid4().hex}"}],
+    )
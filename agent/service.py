@@ -0,0 +1,173 @@
+import os
+import sys
+import threading
+
+from agent.router import IntentRouter
+from agent.workflow import GraphBuilder
+from toolkit.registry import RetrieverRegistry, registry
+from exception.exceptions import PhysicsbotException
+from utils.answer_cache import SemanticAnswerCache, index_key, load_index_versions
+from utils.config_loader import CONFIG_PATH, load_config
+from utils.llm_router import LLMRouter
+from utils.model_loaders import ModelLoader
+
+
+class ChatbotService:
+    """
+    Application-lifetime owner of the compiled graph and the clients behind it.
+
+    Everything is built once at startup and shared by all requests. A reload
+    builds a complete new set of objects first and only then swaps them in, so
+    requests already running keep the graph they started with and a failed
+    reload leaves the running service untouched.
+    """
+
+    COMPONENTS = ("config", "model_loader", "llm", "embeddings", "index", "answer_cache", "router", "graph")
+
+    def __init__(self, config_path: str = CONFIG_PATH):
+        self.config_path = config_path
+        self._lock = threading.Lock()
+        self._config_mtime = None
+        self._components = {}
+
+    def __getattr__(self, name: str):
+        # Components are read from one dict that build() replaces as a whole
+        if name in ChatbotService.COMPONENTS:
+            return self.__dict__["_components"].get(name)
+        raise AttributeError(name)
+
+    def _build_components(self) -> tuple:
+        """
+        :return: (components, registry). The registry is private until build() publishes it.
+        """
+        config = load_config(self.config_path)
+        model_loader = ModelLoader(config=config)
+
+        # The tools share these clients through the global registry, which build() only
+        # replaces once everything here succeeded
+        new_registry = RetrieverRegistry(config=config, model_loader=model_loader)
+        llm = new_registry.get_llm()
+        embeddings = new_registry.get_embeddings()
+        index = new_registry.get_index()
+
+        router = None
+        routing_config = config["routing"]
+        if routing_config["enabled"]:
+            router = IntentRouter(
+                embeddings=embeddings if routing_config["use_embeddings"] else None,
+                similarity_threshold=routing_config["similarity_threshold"],
+                min_margin=routing_config["min_margin"],
+            )
+
+        graph_builder = GraphBuilder(
+            model_loader=model_loader,
+            llm=llm,
+            router=router,
+            direct_tool_answers=config["graph"]["direct_tool_answers"],
+        )
+        graph_builder.build()
+
+        answer_cache = None
+        cache_config = config["cache"]["answer"]
+        if cache_config["enabled"]:
+            answer_cache = SemanticAnswerCache(
+                index_key(config),
+                load_index_versions(config),
+                similarity_threshold=cache_config["similarity_threshold"],
+                ttl_seconds=cache_config["ttl_seconds"],
+                max_entries=cache_config["max_entries"],
+            )
+
+        components = {
+            "config": config,
+            "model_loader": model_loader,
+            "llm": llm,
+            "embeddings": embeddings,
+            "index": index,
+            "answer_cache": answer_cache,
+            "router": router,
+            "graph": graph_builder.get_graph(),
+        }
+        return components, new_registry
+
+    def build(self):
+        """
+        Build all components and publish them. Safe to call concurrently.
+        """
+        try:
+            with self._lock:
+                mtime = os.path.getmtime(self.config_path)
+                components, new_registry = self._build_components()
+                registry.replace_with(new_registry)
+                self._components = components
+                self._config_mtime = mtime
+                print(f"[INFO] Chatbot service built from {self.config_path}")
+        except Exception as e:
+            raise PhysicsbotException(e, sys)
+
+    def config_changed(self) -> bool:
+        return self._config_mtime is None or os.path.getmtime(self.config_path) != self._config_mtime
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Rebuild the service when config.yaml changed since the last build.
+
+        :param force: Rebuild even if the config file is unchanged.
+        :return: True if a rebuild happened.
+        """
+        if not force and not self.config_changed():
+            return False
+        self.build()
+        return True
+
+    def get_graph(self):
+        graph = self.graph
+        if graph is None:
+            raise ValueError("Chatbot service not built. Call build() first.")
+        return graph
+
+    async def lookup_answer(self, question: str) -> tuple:
+        """
+        Look the question up in the semantic answer cache.
+
+        :return: (cached answer or None, question embedding, index version). The embedding and
+            version are passed back to remember_answer() after a miss.
+        """
+        cache = self.answer_cache
+        if cache is None:
+            return None, None, None
+        version = cache.version
+        vector = await self.embeddings.aembed_query(question)
+        return cache.lookup(question, vector), vector, version
+
+    def remember_answer(self, question: str, vector, answer: str, version: int):
+        cache = self.answer_cache
+        if cache is not None and vector is not None:
+            cache.put(question, vector, answer, version=version)
+
+    async def answer(self, question: str) -> str:
+        """
+        Answer a question from the semantic cache, or by running the graph and caching the result.
+        """
+        graph = self.get_graph()
+        cached, vector, version = await self.lookup_answer(question)
+        if cached is not None:
+            return cached
+
+        result = await graph.ainvoke({"messages": [question]})
+        if isinstance(result, dict) and "messages" in result:
+            answer = result["messages"][-1].content  # Last AI response
+        else:
+            answer = str(result)
+        self.remember_answer(question, vector, answer, version)
+        return answer
+
+    def get_stats(self) -> dict:
+        cache = self.answer_cache
+        router = self.router
+        return {
+            "answer_cache": cache.get_stats() if cache is not None else None,
+            "routing": router.get_stats() if router is not None else None,
+            "question_bank": registry.get_question_bank().get_stats() if self.config["question_bank"]["enabled"] else None,
+            "llm_router": self.llm.get_stats() if isinstance(self.llm, LLMRouter) else None,
+        }
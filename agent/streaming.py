@@ -0,0 +1,88 @@
+import json
+
+
+# Graph nodes whose LLM output can be the final answer
+ANSWER_NODES = ("chatbot", "tools", "follow_up")
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Encode one Server-Sent Event. The payload is JSON so newlines in tokens survive.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", "")
+    if isinstance(content, list):
+        # Some providers stream content as a list of parts
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+async def stream_cached_answer(answer: str):
+    """
+    Send an answer from the semantic cache as a single token event.
+    """
+    yield format_sse("token", {"text": answer})
+    yield format_sse("done", {"cached": True})
+
+
+async def stream_graph_events(graph, question: str, on_answer=None):
+    """
+    Run the graph with astream_events and yield SSE strings as work happens.
+
+    Events sent to the client:
+    - tool_start / tool_end: a tool began or finished
+    - token: a piece of the answer text
+    - done: the run finished
+    - error: the run failed
+
+    Answer tokens come from the tool's own LLM call as soon as a tool runs. A tool that
+    answered without an LLM call (a chapter digest or question bank hit) streams nothing,
+    so its output is sent as one token when it ends. Without
+    direct tool answers the chatbot node then repeats that answer, so its tokens are
+    only streamed when no tool answered (e.g. greetings answered directly by the
+    chatbot). A follow_up node adds new reasoning after the tool, so it is always streamed.
+
+    :param on_answer: Optional callable(answer) given the final answer once the run succeeds.
+    """
+    answered_by_tool = False
+    # Run ids of the tool runs whose LLM call streamed tokens
+    streamed_tools = set()
+    # Text of the latest LLM call that can produce the answer, i.e. the final answer once the run ends
+    final_answer = []
+    try:
+        async for event in graph.astream_events({"messages": [question]}, version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_chat_model_start" and node in ANSWER_NODES:
+                final_answer = []
+            elif kind == "on_tool_start":
+                yield format_sse("tool_start", {"name": event["name"]})
+            elif kind == "on_tool_end":
+                output = event["data"].get("output")
+                text = _chunk_text(output) if hasattr(output, "content") else str(output or "")
+                if event["run_id"] not in streamed_tools and text:
+                    answered_by_tool = True
+                    final_answer = [text]
+                    yield format_sse("token", {"text": text})
+                yield format_sse("tool_end", {"name": event["name"]})
+            elif kind == "on_chat_model_stream":
+                text = _chunk_text(event["data"]["chunk"])
+                if not text:
+                    continue
+                if node in ANSWER_NODES:
+                    final_answer.append(text)
+                if node == "tools":
+                    answered_by_tool = True
+                    streamed_tools.update(event.get("parent_ids", []))
+                    yield format_sse("token", {"text": text})
+                elif node == "follow_up" or (node == "chatbot" and not answered_by_tool):
+                    yield format_sse("token", {"text": text})
+        if on_answer is not None:
+            on_answer("".join(final_answer))
+        yield format_sse("done", {})
+    except Exception as e:
+        yield format_sse("error", {"error": str(e)})
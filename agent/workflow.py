@@ -70,28 +70,78 @@
 #         return self.graph
 
 
-from langgraph.graph import StateGraph, START
+import re
+
+from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt.tool_node import ToolNode, tools_condition
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from typing_extensions import Annotated, TypedDict
 from utils.model_loaders import ModelLoader
+from agent.router import IntentRouter, make_tool_call
 from toolkit.tools import *
 
+# Questions asking for more than the tool's answer get an extra LLM pass after the tools
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(step by step|compare|contrast|justify|reasoning|and then|based on (this|that|it)|in your own words|real[- ]life example)\b",
+    re.IGNORECASE,
+)
+
 class State(TypedDict):
     messages: Annotated[list, add_messages]
 
 class GraphBuilder:
-    def __init__(self):
-        self.model_loader=ModelLoader()
-        self.llm = self.model_loader.load_llm()
+    def __init__(self, model_loader: ModelLoader = None, llm=None, router: IntentRouter = None,
+                 direct_tool_answers: bool = False):
+        """
+        :param router: Optional IntentRouter that sends clear-cut questions straight to a tool,
+            skipping the LLM routing call. Unclear questions still go through the chatbot node.
+        :param direct_tool_answers: End the run with the tool's answer instead of passing it back
+            to the chatbot, unless the question asks for follow-up reasoning.
+        """
+        self.model_loader = model_loader if model_loader is not None else ModelLoader()
+        self.llm = llm if llm is not None else self.model_loader.load_llm()
+        self.router = router
+        self.direct_tool_answers = direct_tool_answers
         self.tools = [answer_query_tool,generate_important_questions_tool,summarize_chapter_tool]
         llm_with_tools = self.llm.bind_tools(tools=self.tools)
         self.llm_with_tools = llm_with_tools
         self.graph = None
     
-    def _chatbot_node(self,state:State):
-         return {"messages": [self.llm_with_tools.invoke(state["messages"])]}
+    async def _chatbot_node(self,state:State):
+         return {"messages": [await self.llm_with_tools.ainvoke(state["messages"])]}
+
+    async def _router_node(self, state: State):
+        question = state["messages"][-1].content
+        tool = await self.router.route(question)
+        if tool is None:
+            return {}
+        return {"messages": [make_tool_call(tool, question)]}
+
+    def _after_router(self, state: State) -> str:
+        last_message = state["messages"][-1]
+        return "tools" if getattr(last_message, "tool_calls", None) else "chatbot"
+
+    def _answer_node(self, state: State):
+        # The tool already wrote the answer, so hand it back as the final AI message
+        tool_message = state["messages"][-1]
+        return {"messages": [AIMessage(content=tool_message.content)]}
+
+    def _needs_follow_up(self, state: State) -> bool:
+        messages = state["messages"]
+        question = next(m.content for m in messages if isinstance(m, HumanMessage))
+        if FOLLOW_UP_PATTERN.search(question):
+            return True
+        # Several tool answers in one turn need an LLM pass to be combined
+        trailing_tool_messages = 0
+        for message in reversed(messages):
+            if not isinstance(message, ToolMessage):
+                break
+            trailing_tool_messages += 1
+        return trailing_tool_messages > 1
+
+    def _after_tools(self, state: State) -> str:
+        return "follow_up" if self._needs_follow_up(state) else "answer"
 
     def build(self):
         graph_builder = StateGraph(State)
@@ -102,8 +152,21 @@ class GraphBuilder:
         graph_builder.add_node("tools", tool_node)
         
         graph_builder.add_conditional_edges("chatbot", tools_condition)
-        graph_builder.add_edge("tools", "chatbot")
-        graph_builder.add_edge(START, "chatbot")
+        if self.direct_tool_answers:
+            graph_builder.add_node("answer", self._answer_node)
+            # Same LLM call as the chatbot node, named apart so streaming can tell a follow-up from a repeat
+            graph_builder.add_node("follow_up", self._chatbot_node)
+            graph_builder.add_conditional_edges("tools", self._after_tools, ["answer", "follow_up"])
+            graph_builder.add_conditional_edges("follow_up", tools_condition)
+            graph_builder.add_edge("answer", END)
+        else:
+            graph_builder.add_edge("tools", "chatbot")
+        if self.router is not None:
+            graph_builder.add_node("router", self._router_node)
+            graph_builder.add_edge(START, "router")
+            graph_builder.add_conditional_edges("router", self._after_router, ["tools", "chatbot"])
+        else:
+            graph_builder.add_edge(START, "chatbot")
         
         self.graph = graph_builder.compile()
         
@@ -0,0 +1,59 @@
+from utils.chapter_digests import match_chapter_heading
+from utils.rate_limiter import estimate_tokens
+
+# Running headers and footers repeat on every page and are left out of the chapter text
+CHAPTER_TEXT_CATEGORIES = {"Title", "NarrativeText", "Text", "ListItem", "Table"}
+
+
+def detect_chapters(records: list[dict]) -> list[dict]:
+    """
+    Split one file's element records into chapters at Title/Header elements that read like
+    "Chapter 3: Waves". A heading repeating the current chapter's number (a running header)
+    does not start a new chapter, and content before the first chapter (preface, contents)
+    is ignored.
+
+    :return: [{"number", "title", "texts"}] in file order.
+    """
+    chapters = []
+    current = None
+    for record in records:
+        if record["category"] in ("Title", "Header"):
+            heading = match_chapter_heading(record["content"])
+            if heading and (current is None or heading[0] != current["number"]):
+                number, title = heading
+                current = {"number": number, "title": title, "texts": []}
+                chapters.append(current)
+                continue
+            if heading and not current["title"]:
+                current["title"] = heading[1]
+        if current is None or record["category"] not in CHAPTER_TEXT_CATEGORIES:
+            continue
+        # A bare "Chapter 3" heading is usually followed by the chapter name as the next title
+        if record["category"] == "Title" and not current["title"] and not current["texts"]:
+            current["title"] = record["content"].strip()
+        current["texts"].append(record["content"])
+
+    # A chapter number seen twice (a contents page listing, a later appendix) keeps its longest run
+    longest = {}
+    for chapter in chapters:
+        size = sum(len(text) for text in chapter["texts"])
+        if size and (chapter["number"] not in longest or size > longest[chapter["number"]][0]):
+            longest[chapter["number"]] = (size, chapter)
+    return [longest[number][1] for number in sorted(longest)]
+
+
+def pack_texts(texts: list[str], max_tokens: int) -> list[str]:
+    """
+    Join consecutive texts into groups of at most max_tokens (a single longer text is its own group).
+    """
+    groups, current, used = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and used + tokens > max_tokens:
+            groups.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(text)
+        used += tokens
+    if current:
+        groups.append("\n\n".join(current))
+    return groups
@@ -0,0 +1,104 @@
+import base64
+import io
+
+import numpy as np
+
+_DCT_SIZE = 32
+_HASH_SIZE = 8
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+
+def perceptual_hash(image) -> str:
+    """
+    64-bit DCT perceptual hash of a PIL image, as 16 hex digits. Resized or re-encoded
+    copies of the same picture hash to the same or nearly the same value.
+    """
+    from PIL import Image
+
+    pixels = np.asarray(image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:_HASH_SIZE, :_HASH_SIZE].flatten()
+    # The DC term is the mean brightness, leave it out of the median
+    bits = low > np.median(low[1:])
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+
+def hamming_distance(hash_a: str, hash_b: str) -> int:
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+
+def _flatten(image):
+    """
+    Drop transparency onto a white page background so the image can be stored as JPEG.
+    """
+    from PIL import Image
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def prepare_image(data: bytes, settings: dict):
+    """
+    Filter, downscale and re-encode one extracted image for vision summarization.
+
+    Images below min_side_px, thinner than max_aspect_ratio allows (rules, borders) or
+    nearly a single colour (backgrounds, spacers) are decorative and dropped. The rest are
+    shrunk to fit max_side_px and saved as JPEG at jpeg_quality.
+
+    :return: {"content": base64 JPEG, "phash": perceptual hash}, or None if the image is dropped.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError) as e:
+        print(f"[WARN] Skipping unreadable image: {e}")
+        return None
+
+    width, height = image.size
+    if min(width, height) < settings["min_side_px"]:
+        return None
+    if max(width, height) / min(width, height) > settings["max_aspect_ratio"]:
+        return None
+
+    image = _flatten(image)
+    if np.asarray(image.convert("L"), dtype=np.float64).std() < settings["min_stddev"]:
+        return None
+
+    image.thumbnail((settings["max_side_px"], settings["max_side_px"]), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=settings["jpeg_quality"], optimize=True)
+    return {
+        "content": base64.b64encode(buffer.getvalue()).decode("utf-8"),
+        "phash": perceptual_hash(image),
+    }
+
+
+class ImageDeduplicator:
+    """
+    Remembers the perceptual hashes seen in one file; an image within max_distance bits
+    of an earlier one (a logo or icon repeated on every page) is a duplicate.
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self.hashes = []
+
+    def is_duplicate(self, phash: str) -> bool:
+        if any(hamming_distance(phash, seen) <= self.max_distance for seen in self.hashes):
+            return True
+        self.hashes.append(phash)
+        return False
@@ -5,12 +5,13 @@ from dotenv import load_dotenv
 from langchain_core.documents import Document
 from langchain_community.document_loaders import Docx2txtLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_pinecone import PineconeVectorStore
-from pinecone import ServerlessSpec, Pinecone
-from uuid import uuid4
 import sys
 import time
 import base64
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 from langchain_core.documents import Document as LCDocument
 from exception.exceptions import PhysicsbotException
@@ -20,34 +21,152 @@ from unstructured.partition.pdf import partition_pdf
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
 from utils.model_loaders import ModelLoader
+from utils.rate_limiter import rate_limiters
+from utils.summary_cache import SummaryCache
+from utils.partition_cache import PartitionCache
+from utils.embedding_cache import CachedEmbeddings
+from utils.vector_index import load_vector_index
+from utils.keyword_index import load_keyword_index
+from utils.docstore import load_docstore
+from utils.answer_cache import index_key, load_index_versions
+from dataIngestion.manifest import IngestionManifest, hash_text, make_chunk_id, make_parent_id
+from dataIngestion.stages import Stage, StagePipeline
+from dataIngestion.uploads import SpooledUpload, spool_stream
+from dataIngestion.images import ImageDeduplicator, prepare_image
+from dataIngestion.chapters import detect_chapters, pack_texts
+from utils.chapter_digests import load_digest_store
+from utils.rate_limiter import estimate_tokens
+from prompt.prompt import ChapterSectionDigest, SummarizeChapterTool
 from utils.config_loader import load_config
 from langchain.chat_models import ChatOpenAI 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 
+TEXT_CATEGORY_LABELS = {
+    "Header": "header_summary",
+    "Footer": "footer_summary",
+    "Title": "title_summary",
+    "NarrativeText": "narrative_text_summary",
+    "Text": "text_summary",
+    "ListItem": "list_item_summary",
+}
+
+
+def count_pdf_pages(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def extract_pages(path: str, first_page: int, last_page: int) -> str:
+    """
+    Copy pages [first_page, last_page) of a PDF into a new temp file and return its path.
+    """
+    from pypdf import PdfReader, PdfWriter
+    reader = PdfReader(path)
+    writer = PdfWriter()
+    for page in reader.pages[first_page:last_page]:
+        writer.add_page(page)
+    # Next to the source file, in the upload spool directory rather than /tmp
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", dir=os.path.dirname(path)) as temp_file:
+        writer.write(temp_file)
+        return temp_file.name
+
+
+def partition_file(temp_path: str, file_ext: str, source: str, settings: dict, page_range: tuple = None) -> list[dict]:
+    """
+    Partition one file, or one page range of a PDF, into plain element records. Runs in a
+    worker process, so it only returns picklable data: {"source", "position", "category", "content"},
+    plus "phash" for images, which are filtered and downscaled here rather than in the server process.
+    """
+    records = []
+    if file_ext == ".pdf":
+        pdf_path = extract_pages(temp_path, *page_range) if page_range else temp_path
+        label = f"{source} pages {page_range[0] + 1}-{page_range[1]}" if page_range else source
+        try:
+            start = time.time()
+            elements = partition_pdf(
+                filename=pdf_path,
+                strategy=settings["strategy"],
+                extract_images_in_pdf=True,
+                extract_image_block_types=settings["extract_image_block_types"],
+                extract_image_block_to_payload=True,
+                extract_image_block_output_dir=None
+            )
+            print(f"[INFO] partition_pdf took {time.time() - start:.2f} seconds for {label}")
+        finally:
+            if pdf_path != temp_path:
+                os.remove(pdf_path)
+
+        skipped_images = 0
+        for position, el in enumerate(elements):
+            category = el.category
+            if category in TEXT_CATEGORY_LABELS and el.text:
+                content = el.text
+            elif category == "Table" and el.metadata.text_as_html:
+                content = el.metadata.text_as_html
+            elif category == "Image" and el.metadata.image:
+                image = prepare_image(el.metadata.image.data, settings["images"])
+                if image is None:
+                    skipped_images += 1
+                    continue
+                records.append({"source": source, "position": position, "category": category, **image})
+                continue
+            else:
+                continue
+            records.append({"source": source, "position": position, "category": category, "content": content})
+        if skipped_images:
+            print(f"[INFO] Dropped {skipped_images} small or decorative images from {label}")
+
+    elif file_ext == ".docx":
+        loader = Docx2txtLoader(temp_path)
+        for position, doc in enumerate(loader.load()):
+            records.append({"source": source, "position": position, "category": "DocxText", "content": doc.page_content})
+
+    return records
+
+
 class DataIngestion:
     """
-    Handles document ingestion, categorization, summarization and storage in Pinecone vector DB.
+    Handles document ingestion, categorization, summarization and storage in the
+    configured vector DB (Pinecone or the local index).
     """
 
     def __init__(self):
         try:
             print("Initializing DataIngestion pipeline...")
             self.model_loader = ModelLoader()
-            self._load_env_variables()
             self.config = load_config()
+            self._load_env_variables()
             self.chat_model = self.model_loader.load_chat_model()
 
             # self.image_model = ChatOpenAI(model="gpt-3.5-turbo")
             self.image_model = ChatGoogleGenerativeAI(model="gemini-1.5-flash")
+            self.chat_model_name = self.config["llm"]["google"]["model_name"]
+            self.image_model_name = "gemini-1.5-flash"
+
+            # Both models share the per-model quota with every other caller in this process
+            self.chat_limiter = rate_limiters.get("google", self.chat_model_name)
+            self.image_limiter = rate_limiters.get("google", self.image_model_name)
+            self.summary_cache = SummaryCache()
+            partition_config = self.config["ingestion"]["partition"]
+            self.partition_cache = PartitionCache(partition_config["cache_path"], partition_config["cache_max_size_mb"])
+            self.manifest = IngestionManifest(self.config["ingestion"]["manifest_path"], index_key(self.config))
+            self.index_versions = load_index_versions(self.config)
+            self._stats_lock = threading.Lock()
+            self.max_concurrency = self.config["rate_limits"]["max_concurrency"]
+            self.progress_callback = None
+            self.owned_uploads = []
         except Exception as e:
             raise PhysicsbotException(e, sys)
 
     def _load_env_variables(self):
         try:
             load_dotenv()
-            required_vars = ["GOOGLE_API_KEY", "PINECONE_API_KEY"]
+            required_vars = ["GOOGLE_API_KEY"]
+            if self.config["vector_db"]["backend"] == "pinecone":
+                required_vars.append("PINECONE_API_KEY")
             missing_vars = [var for var in required_vars if os.getenv(var) is None]
             if missing_vars:
                 raise EnvironmentError(f"Missing environment variables: {missing_vars}")
@@ -57,180 +176,517 @@ class DataIngestion:
         except Exception as e:
             raise PhysicsbotException(e, sys)
 
-    def summarize_tables(self, table_html_list: list[str]) -> list[str]:
-        if not table_html_list:
+    def _report(self, stage: str, status: str, **info):
+        """
+        Forward stage progress (partition, summarize, embed, upsert) to the progress callback, if any.
+        """
+        if self.progress_callback is not None:
+            self.progress_callback(stage, status, **info)
+
+    def _rate_limited(self, model, limiter):
+        """
+        Wrap a chat model so every call waits for quota and retries 429s with backoff.
+        """
+        return RunnableLambda(lambda prompt_value: limiter.invoke(model, prompt_value))
+
+    def _summarize_with_cache(self, items: list[str], model_name: str, prompt_text: str, summarize_fn) -> list[str]:
+        """
+        Return summaries for items, calling summarize_fn only for items not in the summary cache.
+        Identical items in one batch are summarized once.
+        """
+        keys = [SummaryCache.make_key(model_name, prompt_text, item) for item in items]
+        summaries = self.summary_cache.get_many(keys)
+
+        missing = {}
+        for key, item in zip(keys, items):
+            if key not in summaries:
+                missing.setdefault(key, item)
+        if missing:
+            fresh = dict(zip(missing.keys(), summarize_fn(list(missing.values()))))
+            self.summary_cache.put_many(fresh)
+            summaries.update(fresh)
+
+        return [summaries[key] for key in keys]
+
+    def _summarize_with_prompt(self, items: list[str], prompt_text: str, variable: str) -> list[str]:
+        """
+        Fill `variable` of prompt_text with each item and summarize them concurrently, through the summary cache.
+        """
+        if not items:
             return []
+        prompt = ChatPromptTemplate.from_template(prompt_text)
+        chain = {variable: lambda x: x} | prompt | self._rate_limited(self.chat_model, self.chat_limiter) | StrOutputParser()
+        return self._summarize_with_cache(
+            items, self.chat_model_name, prompt_text,
+            lambda pending: chain.batch(pending, {"max_concurrency": self.max_concurrency}),
+        )
+
+    def summarize_tables(self, table_html_list: list[str]) -> list[str]:
         prompt_text = """You are an AI Assistant tasked with summarizing tables for retrieval. \
         These summaries will be embedded and used to retrieve the raw table elements. \
         Give a concise summary of the table that is well optimized for retrieval. Table: {element}"""
-        prompt = ChatPromptTemplate.from_template(prompt_text)
-        chain = {"element": lambda x: x} | prompt | self.chat_model | StrOutputParser()
-        return chain.batch(table_html_list, {"max_concurrency": 5})
+        return self._summarize_with_prompt(table_html_list, prompt_text, "element")
 
     def summarize_texts(self, text_list: list[str]) -> list[str]:
-        if not text_list:
-            return []
         prompt_text = "Summarize the following content for semantic retrieval:\n\n{text}"
-        prompt = ChatPromptTemplate.from_template(prompt_text)
-        chain = {"text": lambda x: x} | prompt | self.chat_model | StrOutputParser()
-        return chain.batch(text_list, {"max_concurrency": 5})
+        return self._summarize_with_prompt(text_list, prompt_text, "text")
 
     def summarize_images(self, image_base64_list: list[str]) -> list[str]:
-        summaries = []
+        """
+        Summarize JPEG images (already downscaled by prepare_image) concurrently under the image model's rate limit.
+        """
+        if not image_base64_list:
+            return []
         prompt = """You are an assistant tasked with summarizing images for retrieval. \
                     These summaries will be embedded and used to retrieve the raw image. \
-G                   ive a concise summary of the image that is well optimized for retrieval."""
-        for base64_img in image_base64_list:
-            msg = self.image_model.invoke(
-                [
-                    HumanMessage(
-                        content=[
-                            {"type": "text", "text": prompt},
-                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_img}"}},
-                        ]
-                    )
-                ]
-            )
-            summaries.append(msg.content)
-        return summaries
+                    Give a concise summary of the image that is well optimized for retrieval."""
+
+        def to_messages(base64_img: str) -> list:
+            return [
+                HumanMessage(
+                    content=[
+                        {"type": "text", "text": prompt},
+                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_img}"}},
+                    ]
+                )
+            ]
+
+        chain = RunnableLambda(to_messages) | self._rate_limited(self.image_model, self.image_limiter) | StrOutputParser()
+        return self._summarize_with_cache(
+            image_base64_list, self.image_model_name, prompt,
+            lambda items: chain.batch(items, {"max_concurrency": self.max_concurrency}),
+        )
+
+    def build_chapter_digests(self, source: str, records: list[dict]) -> int:
+        """
+        Precompute a map-reduce digest of every chapter in one file for summarize_chapter_tool.
+
+        Chapter text is cut into sections of section_max_tokens that are condensed in parallel,
+        and the condensed notes are merged level by level until a chapter fits reduce_max_tokens.
+        The final pass uses the tool's own prompt. Chapters whose text is unchanged keep their
+        stored digest, and all chapters of a file are processed together in each level.
+
+        :return: The number of chapters found.
+        """
+        digest_config = self.config["chapter_digests"]
+        section_max_tokens = digest_config["section_max_tokens"]
+        reduce_max_tokens = digest_config["reduce_max_tokens"]
+        stored_hashes = self.digest_store.content_hashes(source)
+
+        chapters, pending = [], []
+        for chapter in detect_chapters(records):
+            entry = {
+                "number": chapter["number"],
+                "title": chapter["title"],
+                "content_hash": hash_text("\n\n".join(chapter["texts"])),
+            }
+            if stored_hashes.get(entry["number"]) == entry["content_hash"]:
+                entry["digest"] = self.digest_store.get(source, entry["number"])["digest"]
+            else:
+                entry["parts"] = chapter["texts"]
+                pending.append(entry)
+            chapters.append(entry)
+
+        while True:
+            oversized = [
+                entry for entry in pending
+                if not entry.get("converged") and estimate_tokens(entry["parts"]) > reduce_max_tokens
+            ]
+            if not oversized:
+                break
+            groups = [pack_texts(entry["parts"], section_max_tokens) for entry in oversized]
+            notes = iter(self._summarize_with_prompt(
+                [group for entry_groups in groups for group in entry_groups], ChapterSectionDigest, "text"
+            ))
+            for entry, entry_groups in zip(oversized, groups):
+                parts = [next(notes) for _ in entry_groups]
+                # The model is not condensing this chapter any further, reduce what is there
+                entry["converged"] = estimate_tokens(parts) >= estimate_tokens(entry["parts"])
+                entry["parts"] = parts
+
+        digests = self._summarize_with_prompt(
+            ["\n\n".join(entry["parts"]) for entry in pending], SummarizeChapterTool, "chapter_text"
+        )
+        for entry, digest in zip(pending, digests):
+            entry["digest"] = digest
+
+        self.digest_store.replace_source(source, chapters)
+        if chapters:
+            print(f"[INFO] {source}: {len(chapters)} chapter digests, {len(pending)} rebuilt")
+        return len(chapters)
 
     def encode_image(self, binary_image_data: bytes) -> str:
         return base64.b64encode(binary_image_data).decode("utf-8")
 
-    def load_documents(self, uploaded_files) -> List[Document]:
-        try:
-            documents = []
-            text_elements = []
-            table_elements = []
-            image_base64_list = []
-
-            for uploaded_file in uploaded_files:
-                file_ext = os.path.splitext(uploaded_file.filename)[1].lower()
-                suffix = file_ext if file_ext in [".pdf", ".docx"] else ".tmp"
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                    temp_file.write(uploaded_file.file.read())
-                    temp_path = temp_file.name
-
-                if file_ext == ".pdf":
-                    start = time.time()
-                    elements = partition_pdf(
-                        filename=temp_path,
-                        strategy='fast',
-                        extract_images_in_pdf=True,
-                        extract_image_block_types=['images', 'table'],
-                        extract_image_block_to_payload=True,
-                        extract_image_block_output_dir=None
+    def summarize_elements(self, records: list[dict]) -> List[Document]:
+        """
+        Summarize one file's partitioned elements, category by category.
+        """
+        documents = []
+        buckets = {}
+        for record in records:
+            buckets.setdefault(record["category"], []).append(record)
+
+        def append_summaries(elements: list[dict], summaries: list[str], label: str):
+            for record, summary in zip(elements, summaries):
+                metadata = {"source": record["source"], "position": record["position"], "type": label}
+                if "parent_id" in record:
+                    metadata["parent_id"] = record["parent_id"]
+                documents.append(Document(page_content=summary, metadata=metadata))
+
+        # Docx text is stored as-is, without summarization
+        for record in buckets.pop("DocxText", []):
+            metadata = {"source": record["source"], "position": record["position"], "type": "docx_text"}
+            documents.append(Document(page_content=record["content"], metadata=metadata))
+
+        tables = buckets.pop("Table", [])
+        append_summaries(tables, self.summarize_tables([r["content"] for r in tables]), "table_summary")
+
+        images = buckets.pop("Image", [])
+        append_summaries(images, self.summarize_images([r["content"] for r in images]), "image_summary")
+
+        # No pauses needed between batches, the shared rate limiter paces the calls
+        for category, label in TEXT_CATEGORY_LABELS.items():
+            elements = buckets.get(category, [])
+            append_summaries(elements, self.summarize_texts([r["content"] for r in elements]), label)
+
+        return documents
+
+    def prepare_files(self, uploaded_files) -> list[tuple]:
+        """
+        Pick the new or changed uploads for the partition workers.
+
+        Uploads are normally SpooledUploads already on disk. Other file objects (anything with
+        `filename` and `file`) are spooled here and deleted again when the pipeline ends.
+
+        :return: List of (source, file_hash, path, file_ext); unchanged and unsupported files are skipped.
+        """
+        upload_config = self.config["ingestion"]["uploads"]
+        pending_files = []
+        for uploaded_file in uploaded_files:
+            file_ext = os.path.splitext(uploaded_file.filename)[1].lower()
+            source = uploaded_file.filename
+            if file_ext not in [".pdf", ".docx"]:
+                print(f"Unsupported file type: {uploaded_file.filename}")
+                continue
+
+            if not isinstance(uploaded_file, SpooledUpload):
+                uploaded_file = spool_stream(
+                    source, uploaded_file.file, upload_config["spool_dir"],
+                    max_bytes=upload_config["max_file_mb"] * 1024 * 1024,
+                    chunk_size=upload_config["chunk_size_kb"] * 1024,
+                )
+                self.owned_uploads.append(uploaded_file)
+
+            if self.manifest.is_unchanged(source, uploaded_file.file_hash, self.derived):
+                print(f"[INFO] Skipping unchanged file: {source}")
+                continue
+            pending_files.append((source, uploaded_file.file_hash, uploaded_file.path, file_ext))
+        return pending_files
+
+    def derived_stores(self) -> list[str]:
+        """
+        Stores built from the same elements as the vector index. A source whose manifest entry
+        lists a different set is ingested again even if the file is unchanged, which backfills
+        stores enabled after it was first ingested.
+        """
+        stores = []
+        if self.config["retriever"]["hybrid"]["enabled"]:
+            stores.append("keyword_index")
+        if self.config["retriever"]["small_to_big"]["enabled"]:
+            stores.append("docstore")
+        if self.config["chapter_digests"]["enabled"]:
+            stores.append("chapter_digests")
+        return stores
+
+    def page_ranges(self, temp_path: str, file_ext: str) -> list:
+        """
+        Split a large PDF into page ranges that are partitioned in parallel; [None] means the whole file.
+        """
+        pages_per_task = self.config["ingestion"]["partition"]["pages_per_task"]
+        if file_ext != ".pdf":
+            return [None]
+        page_count = count_pdf_pages(temp_path)
+        if page_count <= pages_per_task:
+            return [None]
+        return [(first, min(first + pages_per_task, page_count)) for first in range(0, page_count, pages_per_task)]
+
+    def partitioned_files(self, pending_files: list[tuple]):
+        """
+        Partition files in a process pool and yield (source, file_hash, records) as each one finishes.
+
+        Large PDFs are split into page ranges that run on separate workers. Files already in the
+        partition cache are not parsed again. Only partition_workers tasks are in flight at once,
+        so partitioning cannot run further ahead of summarization than the pipeline queues allow.
+        """
+        partition_config = self.config["ingestion"]["partition"]
+        settings = {
+            "strategy": partition_config["strategy"],
+            "extract_image_block_types": partition_config["extract_image_block_types"],
+            "images": self.config["ingestion"]["images"],
+        }
+        workers = self.config["ingestion"]["partition_workers"]
+        # spawn, not fork: this runs inside a worker thread of a multi-threaded server
+        partition_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        remaining = iter(pending_files)
+        tasks = deque()
+        in_flight = {}
+        ready = deque()
+
+        def open_next_file() -> bool:
+            for source, file_hash, temp_path, file_ext in remaining:
+                key = PartitionCache.make_key(file_hash, {**settings, "file_ext": file_ext})
+                records = self.partition_cache.get(key)
+                if records is not None:
+                    print(f"[INFO] Partition cache hit for {source}")
+                    # The cache is keyed by content, so the records may carry the name of an earlier upload
+                    records = [{**record, "source": source} for record in records]
+                    ready.append((source, file_hash, records))
+                    return True
+                ranges = self.page_ranges(temp_path, file_ext)
+                state = {"source": source, "file_hash": file_hash, "temp_path": temp_path, "file_ext": file_ext,
+                         "key": key, "parts": [None] * len(ranges), "remaining": len(ranges)}
+                tasks.extend((state, part, page_range) for part, page_range in enumerate(ranges))
+                return True
+            return False
+
+        def refill():
+            while len(in_flight) < workers and not ready:
+                if not tasks and not open_next_file():
+                    return
+                if tasks:
+                    state, part, page_range = tasks.popleft()
+                    future = partition_pool.submit(
+                        partition_file, state["temp_path"], state["file_ext"], state["source"], settings, page_range
                     )
-                    print(f"[INFO] partition_pdf took {time.time() - start:.2f} seconds")
-
-                                        # Separate content buckets
-                    header_elements = []
-                    footer_elements = []
-                    title_elements = []
-                    narrative_text_elements = []
-                    generic_text_elements = []
-                    list_item_elements = []
-                    table_elements = []
-                    image_base64_list = []
-
-                    for el in elements:
-                        category = el.category
-                        if category == "Header" and el.text:
-                            header_elements.append(el.text)
-                        elif category == "Footer" and el.text:
-                            footer_elements.append(el.text)
-                        elif category == "Title" and el.text:
-                            title_elements.append(el.text)
-                        elif category == "NarrativeText" and el.text:
-                            narrative_text_elements.append(el.text)
-                        elif category == "Text" and el.text:
-                            generic_text_elements.append(el.text)
-                        elif category == "ListItem" and el.text:
-                            list_item_elements.append(el.text)
-                        elif category == "Table" and el.metadata.text_as_html:
-                            table_elements.append(el.metadata.text_as_html)
-                        elif category == "Image" and el.metadata.image:
-                            encoded = self.encode_image(el.metadata.image.data)
-                            image_base64_list.append(encoded)
-
-
-                elif file_ext == ".docx":
-                    loader = Docx2txtLoader(temp_path)
-                    documents.extend(loader.load())
-                else:
-                    print(f"Unsupported file type: {uploaded_file.filename}")
-
-            # Summarize and store table summaries
-            table_summaries = self.summarize_tables(table_elements)
-            for summary in table_summaries:
-                documents.append(Document(page_content=summary, metadata={"type": "table_summary"}))
-
-            # Summarize and store text summaries
-            # Helper function
-            def summarize_and_append(elements: list[str], label: str):
-                summaries = self.summarize_texts(elements)
-                for summary in summaries:
-                    documents.append(Document(page_content=summary, metadata={"type": label}))
-
-            summarize_and_append(header_elements, "header_summary")
-            time.sleep(20)
-            summarize_and_append(footer_elements, "footer_summary")
-            time.sleep(20)
-            summarize_and_append(title_elements, "title_summary")
-            time.sleep(20)
-            summarize_and_append(narrative_text_elements, "narrative_text_summary")
-            time.sleep(20)
-            summarize_and_append(generic_text_elements, "text_summary")
-            time.sleep(20)
-            summarize_and_append(list_item_elements, "list_item_summary")
-
-            # Summarize and store image summaries
-            image_summaries = self.summarize_images(image_base64_list)
-            for summary in image_summaries:
-                documents.append(Document(page_content=summary, metadata={"type": "image_summary"}))
-
-            return documents
-        except Exception as e:
-            raise PhysicsbotException(e, sys)
+                    in_flight[future] = (state, part)
 
-    def store_in_vector_db(self, documents: List[Document]):
         try:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                length_function=len
-            )
-            documents = text_splitter.split_documents(documents)
+            done_count = 0
+            while True:
+                refill()
+                if ready:
+                    done_count += 1
+                    self._report("partition", "running", done=done_count, total=len(pending_files))
+                    yield ready.popleft()
+                    continue
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    state, part = in_flight.pop(future)
+                    state["parts"][part] = future.result()
+                    state["remaining"] -= 1
+                    if state["remaining"] == 0:
+                        records = [record for part_records in state["parts"] for record in part_records]
+                        if len(state["parts"]) > 1:
+                            # Positions restart in every page range
+                            for position, record in enumerate(records):
+                                record["position"] = position
+                        self.partition_cache.put(state["key"], records)
+                        ready.append((state["source"], state["file_hash"], records))
+            self._report("partition", "completed", cache=self.partition_cache.get_stats())
+        finally:
+            partition_pool.shutdown(cancel_futures=True)
 
-            pinecone_client = Pinecone(api_key=self.pinecone_api_key)
-            index_name = self.config["vector_db"]["index_name"]
-
-            if index_name not in [i.name for i in pinecone_client.list_indexes()]:
-                pinecone_client.create_index(
-                    name=index_name,
-                    dimension=768,
-                    metric="cosine",
-                    spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-                )
+    def _count(self, name: str, amount: int) -> int:
+        with self._stats_lock:
+            self.stream_stats[name] += amount
+            return self.stream_stats[name]
 
-            index = pinecone_client.Index(index_name)
-            vector_store = PineconeVectorStore(index=index, embedding=self.model_loader.load_embeddings())
-            uuids = [str(uuid4()) for _ in range(len(documents))]
+    def summarize_stage(self, item):
+        """
+        Summarize one partitioned file in batches of stream_batch_size elements, then mark its end.
+        Images that repeat an earlier image of the file are dropped before summarization.
+        With small-to-big retrieval the raw elements are kept in the docstore under their parent IDs,
+        and chapter digests are built once the file's summaries have been handed on.
+        """
+        source, file_hash, records = item
+        batch_size = self.config["ingestion"]["stream_batch_size"]
+        deduplicator = ImageDeduplicator(self.config["ingestion"]["images"]["dedupe_max_distance"])
+        records = [
+            record for record in records
+            if record["category"] != "Image" or not deduplicator.is_duplicate(record["phash"])
+        ]
+        self._count("unique_images", len(deduplicator.hashes))
+        occurrences = {}
+        parent_ids = []
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            if self.docstore is not None:
+                for record in batch:
+                    if record["category"] == "DocxText":
+                        continue
+                    key = (record["category"], hash_text(record["content"]))
+                    occurrences[key] = occurrences.get(key, 0) + 1
+                    record["parent_id"] = make_parent_id(source, *key, occurrences[key] - 1)
+                    parent_ids.append(record["parent_id"])
+                self.docstore.put_many([record for record in batch if "parent_id" in record])
+            documents = self.summarize_elements(batch)
+            self._report("summarize", "running", documents=self._count("summarized", len(documents)))
+            yield {"source": source, "documents": documents}
+        if self.digest_store is not None:
+            self._count("chapters", self.build_chapter_digests(source, records))
+        yield {"source": source, "file_hash": file_hash, "parent_ids": parent_ids, "end": True}
 
-            vector_store.add_documents(documents=documents, ids=uuids)
-        except Exception as e:
-            raise PhysicsbotException(e, sys)
+    def split_stage(self, item):
+        """
+        Split summaries into chunks, assign their IDs and keep only chunks the manifest has not seen.
+        """
+        if item.get("end"):
+            yield item
+            return
+        source = item["source"]
+        chunks = self.text_splitter.split_documents(item["documents"])
+        chunk_ids = self.assign_chunk_ids(chunks)
+        self.source_chunk_ids.setdefault(source, []).extend(chunk_ids)
+        # A source recorded without one of the enabled derived stores sends every chunk on,
+        # so the keyword index gets the chunks the vector index already has
+        known_ids = self.manifest.chunk_ids(source) if self.manifest.has_derived(source, self.derived) else set()
+        pending = [(chunk_id, doc) for chunk_id, doc in zip(chunk_ids, chunks) if chunk_id not in known_ids]
+        self._count("chunks", len(chunks))
+        if pending:
+            yield {"source": source, "pending": pending}
+
+    def embed_stage(self, item):
+        if item.get("end"):
+            yield item
+            return
+        pending = item["pending"]
+        vectors = self.embeddings.embed_documents([doc.page_content for _, doc in pending])
+        self._report("embed", "running", done=self._count("embedded", len(vectors)))
+        yield {
+            "source": item["source"],
+            "records": [
+                {"id": chunk_id, "values": vector, "metadata": {**doc.metadata, "text": doc.page_content}}
+                for (chunk_id, doc), vector in zip(pending, vectors)
+            ],
+        }
 
-    def run_pipeline(self, uploaded_files):
+    def upsert_stage(self, item):
+        """
+        Upsert a batch of vectors. At the end of a source, delete its stale chunks and record it in the manifest.
+        """
+        batch_size = self.config["ingestion"]["upsert_batch_size"]
+        if not item.get("end"):
+            records = item["records"]
+            for start in range(0, len(records), batch_size):
+                self.index.upsert(vectors=records[start:start + batch_size])
+            if self.keyword_index is not None:
+                self.keyword_index.add(records)
+            # New chunks are searchable now, so cached answers from this index may be outdated
+            self.index_versions.bump(index_key(self.config))
+            self._report("upsert", "running", done=self._count("upserted", len(records)))
+            return []
+
+        source = item["source"]
+        source_ids = self.source_chunk_ids.pop(source, [])
+        new_ids, stale_ids = self.manifest.diff(source, source_ids)
+        stale_ids = sorted(stale_ids)
+        for start in range(0, len(stale_ids), batch_size):
+            self.index.delete(ids=stale_ids[start:start + batch_size])
+        if self.keyword_index is not None:
+            self.keyword_index.delete(stale_ids)
+        if stale_ids:
+            self.index_versions.bump(index_key(self.config))
+        if self.docstore is not None:
+            self.docstore.delete_stale(source, item["parent_ids"])
+        self._count("deleted", len(stale_ids))
+
+        print(f"[INFO] {source}: {len(source_ids)} chunks, {len(new_ids)} new, {len(stale_ids)} stale")
+        self.manifest.record(source, item["file_hash"], source_ids, self.derived)
+        self.manifest.save([source])
+        return []
+
+    def assign_chunk_ids(self, documents: List[Document]) -> List[str]:
+        """
+        Give every chunk a deterministic ID from its source, type and content hash.
+        Occurrence counts carry over between batches of the same source.
+        """
+        ids = []
+        for doc in documents:
+            content_hash = hash_text(doc.page_content)
+            key = (doc.metadata["source"], doc.metadata["type"], content_hash)
+            self.chunk_occurrences[key] = self.chunk_occurrences.get(key, 0) + 1
+            ids.append(make_chunk_id(*key, self.chunk_occurrences[key] - 1))
+            doc.metadata["content_hash"] = content_hash
+        return ids
+
+    def get_index(self):
+        pinecone_client = None
+        if self.config["vector_db"]["backend"] == "pinecone":
+            from pinecone import Pinecone
+            pinecone_client = Pinecone(api_key=self.pinecone_api_key)
+        return load_vector_index(self.config, pinecone_client=pinecone_client)
+
+    def run_pipeline(self, uploaded_files, progress_callback=None):
+        """
+        Stream files through partition -> summarize -> split -> embed -> upsert, with bounded
+        queues between stages. Chunks are searchable as soon as their batch is upserted, and
+        memory stays bounded by the queue size and batch size rather than the number of files.
+
+        :param progress_callback: Optional callable(stage, status, **info) called as each stage advances.
+        """
         try:
-            documents = self.load_documents(uploaded_files)
-            if not documents:
-                print("No valid documents found.")
+            self.progress_callback = progress_callback
+            self.owned_uploads = []
+            self.derived = self.derived_stores()
+            ingestion_config = self.config["ingestion"]
+            pending_files = self.prepare_files(uploaded_files)
+            self._report("partition", "running", done=0, total=len(pending_files))
+            if not pending_files:
+                self._report("partition", "completed")
+                print("No new or changed documents found.")
                 return
-            self.store_in_vector_db(documents)
+
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=200,
+                length_function=len
+            )
+            self.embeddings = self.model_loader.load_embeddings()
+            self.index = self.get_index()
+            # The BM25 side of hybrid retrieval indexes the same chunks under the same IDs
+            self.keyword_index = load_keyword_index(self.config) if self.config["retriever"]["hybrid"]["enabled"] else None
+            # Raw elements behind the summaries, for small-to-big retrieval
+            self.docstore = load_docstore(self.config) if self.config["retriever"]["small_to_big"]["enabled"] else None
+            # Precomputed chapter summaries served by summarize_chapter_tool
+            self.digest_store = load_digest_store(self.config) if self.config["chapter_digests"]["enabled"] else None
+            self.chunk_occurrences = {}
+            self.source_chunk_ids = {}
+            self.stream_stats = {
+                "unique_images": 0, "summarized": 0, "chapters": 0, "chunks": 0, "embedded": 0, "upserted": 0,
+                "deleted": 0,
+            }
+
+            # A file is summarized by one worker from start to end and every later stage has a
+            # single worker, so each source's end marker reaches upsert after all its batches
+            pipeline = StagePipeline(
+                [
+                    Stage("summarize", self.summarize_stage, workers=ingestion_config["summarize_workers"]),
+                    Stage("split", self.split_stage),
+                    Stage("embed", self.embed_stage),
+                    Stage("upsert", self.upsert_stage),
+                ],
+                queue_size=ingestion_config["queue_size"],
+            )
+            pipeline.run(self.partitioned_files(pending_files))
+
+            stats = self.stream_stats
+            embedding_stats = self.embeddings.cache.get_stats() if isinstance(self.embeddings, CachedEmbeddings) else None
+            self._report("summarize", "completed", documents=stats["summarized"], cache=self.summary_cache.get_stats())
+            self._report("embed", "completed", done=stats["embedded"], cache=embedding_stats)
+            self._report("upsert", "completed", done=stats["upserted"], deleted=stats["deleted"])
+            print(f"[INFO] Ingestion stats: {stats}")
+            print(f"[INFO] Summary cache stats: {self.summary_cache.get_stats()}")
+            if embedding_stats:
+                print(f"[INFO] Embedding cache stats: {embedding_stats}")
+            print(f"[INFO] LLM rate limiter stats: {rate_limiters.get_stats()}")
         except Exception as e:
             raise PhysicsbotException(e, sys)
+        finally:
+            for upload in self.owned_uploads:
+                upload.cleanup()
 
 if __name__ == '__main__':
     pass
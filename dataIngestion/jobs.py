@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from dataIngestion.ingestion_pipeline import DataIngestion
+from dataIngestion.uploads import clean_spool_dir
+from utils.config_loader import load_config
+
+STAGES = ["partition", "summarize", "embed", "upsert"]
+
+
+class IngestionJob:
+    """
+    State of one background ingestion run, with per-stage status and timings.
+    """
+
+    def __init__(self, filenames: list[str]):
+        self.id = str(uuid4())
+        self.filenames = filenames
+        self.status = "queued"
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stages = {stage: {"status": "pending"} for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def update_stage(self, stage: str, status: str, **info):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"status": "pending"})
+            now = time.time()
+            if status == "running" and "started_at" not in entry:
+                entry["started_at"] = now
+            if status == "completed":
+                entry["finished_at"] = now
+                entry["seconds"] = round(now - entry.get("started_at", now), 2)
+            entry["status"] = status
+            entry.update(info)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "files": self.filenames,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "seconds": round(self.finished_at - self.started_at, 2) if self.finished_at and self.started_at else None,
+                "stages": {stage: dict(entry) for stage, entry in self.stages.items()},
+            }
+
+
+class IngestionJobManager:
+    """
+    Runs DataIngestion pipelines on a bounded worker pool and keeps their status for polling.
+    """
+
+    def __init__(self, max_workers: int = None, max_jobs: int = None):
+        config = load_config()["ingestion"]
+        self.max_jobs = max_jobs or config["max_jobs"]
+        # Spooled uploads are deleted when their job ends; this catches files left by a crash
+        clean_spool_dir(config["uploads"]["spool_dir"], config["uploads"]["stale_after_seconds"])
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config["max_workers"],
+            thread_name_prefix="ingestion",
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, uploads: list) -> str:
+        """
+        Queue SpooledUploads for ingestion. The job owns the files and deletes them when it ends.
+        """
+        job = IngestionJob([upload.filename for upload in uploads])
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict_finished()
+        self._executor.submit(self._run, job, uploads)
+        return job.id
+
+    def _evict_finished(self):
+        # Forget the oldest finished jobs once we keep more than max_jobs
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status in ("succeeded", "failed"):
+                del self._jobs[job_id]
+
+    def _run(self, job: IngestionJob, uploads: list):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            ingestion = DataIngestion()
+            ingestion.run_pipeline(uploads, progress_callback=job.update_stage)
+            job.status = "succeeded"
+        except Exception as e:
+            print(f"[ERROR] Ingestion job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            for upload in uploads:
+                upload.cleanup()
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> dict:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
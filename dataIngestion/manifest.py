@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.config_loader import resolve_path
+
+# Ingestion jobs run in parallel worker threads and all share one manifest file
+_manifest_lock = threading.Lock()
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_chunk_id(source: str, chunk_type: str, content_hash: str, occurrence: int) -> str:
+    """
+    Deterministic vector ID for a chunk.
+
+    The ID depends on the chunk's content and not on where it sits in the file, so
+    inserting a paragraph in a revised edition only adds IDs, it does not shift every
+    ID after it. `occurrence` separates identical chunks within the same source.
+    """
+    return hashlib.sha256(f"{source}\0{chunk_type}\0{content_hash}\0{occurrence}".encode("utf-8")).hexdigest()[:32]
+
+
+def make_parent_id(source: str, category: str, content_hash: str, occurrence: int) -> str:
+    """
+    Deterministic docstore ID for a raw element, built like make_chunk_id so an unchanged
+    element keeps its ID (and its indexed summaries stay linked) across re-ingestion.
+    """
+    return make_chunk_id(source, f"parent:{category}", content_hash, occurrence)
+
+
+class IngestionManifest:
+    """
+    Local JSON record of what each source file contributed to a vector index:
+    the file hash last ingested and the IDs of its chunks.
+
+    Entries are kept per index (see utils.answer_cache.index_key), so switching the
+    backend or index name does not skip files that were only ingested elsewhere.
+    """
+
+    def __init__(self, path: str, index: str):
+        self.path = resolve_path(path)
+        self.index = index
+        self.sources = self._load().get(self.index, {})
+
+    def _load(self) -> dict:
+        """
+        :return: {index: {source: entry}} for every index in the file.
+        """
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as file:
+            # Manifests written before entries were keyed by index have only "sources"; the
+            # index they describe is unknown, so those files are ingested again
+            return json.load(file).get("indexes", {})
+
+    def is_unchanged(self, source: str, file_hash: str, derived: list[str]) -> bool:
+        """
+        True when source was ingested from the same file with the same derived stores
+        (keyword index, docstore, ...) enabled, so there is nothing to backfill.
+        """
+        entry = self.sources.get(source)
+        return entry is not None and entry["file_hash"] == file_hash and self.has_derived(source, derived)
+
+    def has_derived(self, source: str, derived: list[str]) -> bool:
+        entry = self.sources.get(source)
+        return entry is not None and entry.get("derived") == sorted(derived)
+
+    def chunk_ids(self, source: str) -> set:
+        entry = self.sources.get(source)
+        return set(entry["chunk_ids"]) if entry else set()
+
+    def diff(self, source: str, new_ids: list[str]) -> tuple[set, set]:
+        """
+        :return: (ids to add, stale ids to delete) compared to the last ingestion of source.
+        """
+        old_ids = self.chunk_ids(source)
+        new_ids = set(new_ids)
+        return new_ids - old_ids, old_ids - new_ids
+
+    def record(self, source: str, file_hash: str, chunk_ids: list[str], derived: list[str]):
+        self.sources[source] = {
+            "file_hash": file_hash,
+            "chunk_ids": sorted(set(chunk_ids)),
+            "derived": sorted(derived),
+            "ingested_at": time.time(),
+        }
+
+    def save(self, updated_sources: list[str]):
+        """
+        Write the given sources back, merged with whatever other jobs saved meanwhile.
+        """
+        with _manifest_lock:
+            indexes = self._load()
+            merged = indexes.setdefault(self.index, {})
+            for source in updated_sources:
+                merged[source] = self.sources[source]
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as file:
+                json.dump({"indexes": indexes}, file)
+            os.replace(temp_path, self.path)
+            self.sources = merged
@@ -0,0 +1,73 @@
+import argparse
+import sys
+
+from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+
+from exception.exceptions import PhysicsbotException
+from prompt.prompt import GenerateChapterQuestions
+from utils.chapter_digests import load_digest_store
+from utils.config_loader import load_config
+from utils.model_loaders import ModelLoader
+from utils.question_bank import chapter_topic, load_question_bank
+from utils.rate_limiter import rate_limiters
+
+
+def build_question_bank(config: dict = None, refresh: bool = False) -> dict:
+    """
+    Generate exam questions for every ingested chapter digest and store them in the question
+    bank, so generate_important_questions_tool can answer those topics without an LLM call.
+
+    Chapters already in the bank are skipped unless refresh is set. Generation runs
+    concurrently under the shared rate limit of the configured Google model.
+
+    :return: {"chapters", "generated", "skipped", "failed"}
+    """
+    try:
+        config = config if config is not None else load_config()
+        bank_config = config["question_bank"]
+        digest_store = load_digest_store(config)
+        bank = load_question_bank(config)
+
+        chapters = digest_store.list_chapters()
+        pending = [chapter for chapter in chapters if refresh or not bank.has(chapter_topic(chapter))]
+        stats = {"chapters": len(chapters), "generated": 0, "skipped": len(chapters) - len(pending), "failed": 0}
+        if not pending:
+            return stats
+
+        model_name = config["llm"]["google"]["model_name"]
+        # The Google model itself, not the load_llm() router, since the calls go through its rate limiter
+        llm = ModelLoader(config=config).load_chat_model("google")
+        limiter = rate_limiters.get("google", model_name)
+        chain = (
+            PromptTemplate.from_template(GenerateChapterQuestions)
+            | RunnableLambda(lambda prompt_value: limiter.invoke(llm, prompt_value))
+            | StrOutputParser()
+        )
+        inputs = [
+            {
+                "chapter_or_topic": chapter_topic(chapter),
+                "chapter_digest": digest_store.get(chapter["source"], chapter["number"])["digest"],
+            }
+            for chapter in pending
+        ]
+        results = chain.batch(inputs, {"max_concurrency": bank_config["max_concurrency"]}, return_exceptions=True)
+
+        for chapter, result in zip(pending, results):
+            if isinstance(result, Exception):
+                stats["failed"] += 1
+                print(f"[WARN] Question generation failed for {chapter['source']} chapter {chapter['number']}: {result}")
+                continue
+            bank.put(chapter_topic(chapter), result, origin="offline")
+            stats["generated"] += 1
+        return stats
+    except Exception as e:
+        raise PhysicsbotException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate exam questions for the ingested chapters.")
+    parser.add_argument("--refresh", action="store_true", help="regenerate chapters already in the bank")
+    args = parser.parse_args()
+    print(f"[INFO] Question bank: {build_question_bank(refresh=args.refresh)}")
@@ -0,0 +1,114 @@
+import queue
+import threading
+from typing import Callable, Iterable
+
+# Marks the end of the stream on a queue
+_END = object()
+
+
+class Stage:
+    """
+    One step of a StagePipeline. `fn(item)` returns an iterable (usually a generator)
+    of items for the next stage, so a stage can fan one item out into many or drop it.
+    """
+
+    def __init__(self, name: str, fn: Callable[[object], Iterable], workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+
+
+class StagePipeline:
+    """
+    Runs items from a source iterator through a chain of stages, each on its own
+    worker threads, connected by bounded queues.
+
+    A full queue blocks the stage feeding it, so at most `queue_size` items wait between
+    any two stages whatever the size of the input. The outputs of the last stage are discarded.
+    The first error raised by any stage stops the whole pipeline and is re-raised by run().
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = 4):
+        self.stages = stages
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+        self._error = None
+        self._lock = threading.Lock()
+
+    def _fail(self, error: Exception):
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        # Poll so a blocked producer notices when another stage has failed
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _feed(self, source: Iterable, out_q: queue.Queue):
+        try:
+            for item in source:
+                if not self._put(out_q, item):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            if hasattr(source, "close"):
+                source.close()
+            self._put(out_q, _END)
+
+    def _work(self, stage: Stage, in_q: queue.Queue, out_q: queue.Queue, remaining: list):
+        try:
+            while True:
+                item = self._get(in_q)
+                if item is _END:
+                    break
+                for output in stage.fn(item):
+                    if out_q is not None and not self._put(out_q, output):
+                        return
+        except Exception as e:
+            print(f"[ERROR] Pipeline stage '{stage.name}' failed: {e}")
+            self._fail(e)
+        finally:
+            # Hand the end marker on to sibling workers; the last one out closes the next queue
+            self._put(in_q, _END)
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and out_q is not None:
+                self._put(out_q, _END)
+
+    def run(self, source: Iterable):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = [threading.Thread(target=self._feed, args=(source, queues[0]), name="pipeline-feed")]
+        for position, stage in enumerate(self.stages):
+            out_q = queues[position + 1] if position + 1 < len(queues) else None
+            remaining = [stage.workers]
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[position], out_q, remaining),
+                    name=f"pipeline-{stage.name}-{worker}",
+                ))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import tempfile
+import time
+
+from utils.config_loader import resolve_path
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class SpooledUpload:
+    """
+    An uploaded file streamed to disk, with the size and sha256 computed while it was written.
+    Owned by the ingestion job, which deletes it with cleanup() when the job ends.
+    """
+
+    def __init__(self, filename: str, path: str, size: int, file_hash: str):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.file_hash = file_hash
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _SpoolWriter:
+    def __init__(self, filename: str, spool_dir: str, max_bytes: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.digest = hashlib.sha256()
+        spool_dir = resolve_path(spool_dir)
+        os.makedirs(spool_dir, exist_ok=True)
+        suffix = os.path.splitext(filename)[1].lower()
+        self.file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=spool_dir)
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(
+                f"{self.filename} is larger than the {self.max_bytes // (1024 * 1024)} MB upload limit."
+            )
+        self.digest.update(chunk)
+        self.file.write(chunk)
+
+    def close(self) -> SpooledUpload:
+        self.file.close()
+        return SpooledUpload(self.filename, self.file.name, self.size, self.digest.hexdigest())
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.file.name)
+
+
+def spool_stream(filename: str, stream, spool_dir: str, max_bytes: int, chunk_size: int = 1024 * 1024) -> SpooledUpload:
+    """
+    Copy a binary file object to the spool directory chunk by chunk.
+    """
+    writer = _SpoolWriter(filename, spool_dir, max_bytes)
+    try:
+        while chunk := stream.read(chunk_size):
+            writer.write(chunk)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.close()
+
+
+async def spool_upload(upload, spool_dir: str, max_bytes: int, chunk_size: int = 1024 * 1024) -> SpooledUpload:
+    """
+    Stream a FastAPI UploadFile to the spool directory without holding it in memory.
+    """
+    writer = _SpoolWriter(upload.filename, spool_dir, max_bytes)
+    try:
+        while chunk := await upload.read(chunk_size):
+            writer.write(chunk)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.close()
+
+
+def clean_spool_dir(spool_dir: str, max_age_seconds: float):
+    """
+    Remove spooled files left behind by a crashed process.
+    """
+    spool_dir = resolve_path(spool_dir)
+    if not os.path.isdir(spool_dir):
+        return
+    cutoff = time.time() - max_age_seconds
+    for name in os.listdir(spool_dir):
+        path = os.path.join(spool_dir, name)
+        if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
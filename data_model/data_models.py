@@ -1,7 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from langgraph.graph.message import add_messages
-from typing import Annotated, TypedDict
+from typing import Annotated, List, Optional, TypedDict
 class RagToolSchema(BaseModel):
     question:str 
 class QuestionRequest(BaseModel):
-    question: str
\ No newline at end of file
+    question: str
+class ReloadRequest(BaseModel):
+    force: bool = False
+class BatchQuestionRequest(BaseModel):
+    questions: List[str]
+    max_concurrency: Optional[int] = Field(None, gt=0)
@@ -1,12 +1,33 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
-from starlette.responses import JSONResponse
-from dataIngestion.ingestion_pipeline import DataIngestion  # you already have this
-from agent.workflow import GraphBuilder  # this should be your graph stream handler
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from dataIngestion.jobs import IngestionJobManager
+from dataIngestion.uploads import UploadTooLargeError, spool_upload
+from agent.service import ChatbotService
+from agent.streaming import stream_cached_answer, stream_graph_events
+from agent.batch import stream_batch_answers
+from toolkit.registry import registry
+from utils.rate_limiter import rate_limiters
 from data_model.data_models import *
+from utils.config_loader import load_config
 
-app = FastAPI()
+chatbot_service = ChatbotService()
+job_manager = IngestionJobManager()
+upload_config = load_config()["ingestion"]["uploads"]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the graph, LLM, embeddings and index handle once for the whole app
+    chatbot_service.build()
+    yield
+    job_manager.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,34 +37,106 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/upload")
+@app.post("/upload", status_code=202)
 async def upload_files(files: List[UploadFile] = File(...)):
+    uploads = []
     try:
-        ingestion = DataIngestion()
-        ingestion.run_pipeline(files)
-        return {"message": "Files successfully processed and stored."}
+        # UploadFile is closed once the response is sent, so stream it to disk before handing off to a worker
+        for f in files:
+            uploads.append(await spool_upload(
+                f,
+                upload_config["spool_dir"],
+                max_bytes=upload_config["max_file_mb"] * 1024 * 1024,
+                chunk_size=upload_config["chunk_size_kb"] * 1024,
+            ))
+        job_id = job_manager.submit(uploads)
+        return {"message": "Files accepted for processing.", "job_id": job_id}
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        for upload in uploads:
+            upload.cleanup()
+        status_code = 413 if isinstance(e, UploadTooLargeError) else 500
+        return JSONResponse(status_code=status_code, content={"error": str(e)})
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Job '{job_id}' not found."})
+    return job
     
 
 @app.post("/query")
 async def query_chatbot(request: QuestionRequest):
     try:
-        graph_service = GraphBuilder()
-        graph_service.build()
-        graph = graph_service.get_graph()
-        
-        # Assuming request is a pydantic object like: {"question": "your text"}
-        messages={"messages": [request.question]}
-        
-        result = graph.invoke(messages)
-        
-        # If result is dict with messages:
-        if isinstance(result, dict) and "messages" in result:
-            final_output = result["messages"][-1].content  # Last AI response
-        else:
-            final_output = str(result)
-        
+        # Served from the semantic answer cache when a similar question was answered before
+        final_output = await chatbot_service.answer(request.question)
+
         return {"answer": final_output}
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
\ No newline at end of file
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/query/stream")
+async def query_chatbot_stream(request: QuestionRequest):
+    try:
+        graph = chatbot_service.get_graph()
+        cached, vector, version = await chatbot_service.lookup_answer(request.question)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+    if cached is not None:
+        events = stream_cached_answer(cached)
+    else:
+        events = stream_graph_events(
+            graph,
+            request.question,
+            on_answer=lambda answer: chatbot_service.remember_answer(request.question, vector, answer, version),
+        )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/query/batch")
+async def query_chatbot_batch(request: BatchQuestionRequest):
+    try:
+        chatbot_service.get_graph()
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+    batch_config = chatbot_service.config["batch"]
+    if not request.questions:
+        return JSONResponse(status_code=400, content={"error": "No questions given."})
+    if len(request.questions) > batch_config["max_questions"]:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"At most {batch_config['max_questions']} questions per batch."},
+        )
+
+    max_concurrency = min(request.max_concurrency or batch_config["max_concurrency"], batch_config["max_concurrency"])
+    return StreamingResponse(
+        stream_batch_answers(chatbot_service, request.questions, max_concurrency),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/admin/reload")
+async def reload_service(request: ReloadRequest):
+    try:
+        reloaded = await run_in_threadpool(chatbot_service.reload, request.force)
+        return {"reloaded": reloaded}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "retriever_registry": registry.get_stats(),
+        "rate_limits": rate_limiters.get_stats(),
+        **chatbot_service.get_stats(),
+    }
@@ -36,3 +36,32 @@ Summarize the following chapter content into:
 Text:
 {chapter_text}
 """
+
+ChapterSectionDigest = """
+You are condensing part of a 10th Class Physics chapter so that it can later be summarized as a whole.
+
+Rewrite the following content as compact notes that keep:
+- Every concept and definition introduced
+- All formulas, with what their symbols mean
+- Laws, units and real-world applications mentioned
+
+Text:
+{text}
+"""
+
+GenerateChapterQuestions = """
+You are a 10th Class Physics teacher preparing students for board exams.
+
+Generate important board-style questions from the following chapter:
+"{chapter_or_topic}"
+
+Chapter summary:
+{chapter_digest}
+
+Make sure the questions are:
+- Based on the concepts, formulas and applications in the chapter summary
+- A mix of theoretical, conceptual, and numerical
+- Well-formatted like actual exam questions
+
+Don't provide answers, only the questions.
+"""
@@ -82,11 +82,16 @@
 
 
 
+import json
+import time
 import streamlit as st
 import requests
+from requests_toolbelt import MultipartEncoder
 # from exception.exceptions import TradingBotException
 import sys
 BASE_URL = "http://localhost:8000"  # Change if backend runs elsewhere
+# Stop waiting for an ingestion job after this long
+JOB_TIMEOUT_SECONDS = 3600
 
 st.set_page_config(
     page_title="Physics Helping Chatbot",
@@ -107,19 +112,49 @@ with st.sidebar:
         if uploaded_files:
             files = []
             for f in uploaded_files:
-                file_data = f.read()
-                if not file_data:
+                if not f.size:
                     continue  # skip empty files
-                files.append(("files", (getattr(f, "name", "file.pdf"), file_data, f"type")))
+                f.seek(0)
+                files.append(("files", (getattr(f, "name", "file.pdf"), f, f.type)))
 
             if files:
                 try:
-                    with st.spinner("Uploading and processing files..."):
-                        response = requests.post(f"{BASE_URL}/upload", files=files)
-                        if response.status_code == 200:
+                    with st.spinner("Uploading files..."):
+                        # The encoder reads the files in chunks while sending instead of building the whole body in memory
+                        encoder = MultipartEncoder(fields=files)
+                        response = requests.post(
+                            f"{BASE_URL}/upload", data=encoder, headers={"Content-Type": encoder.content_type}
+                        )
+                    if response.status_code == 202:
+                        # Ingestion runs in the background, poll the job until it finishes
+                        job_id = response.json()["job_id"]
+                        progress = st.empty()
+                        deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+                        job, failure = None, None
+                        while True:
+                            job_response = requests.get(f"{BASE_URL}/jobs/{job_id}", timeout=30)
+                            if job_response.status_code != 200:
+                                # e.g. 404 after a server restart or once the job was evicted
+                                failure = f"job status unavailable ({job_response.status_code}): {job_response.text}"
+                                break
+                            job = job_response.json()
+                            stages = ", ".join(f"{name}: {stage['status']}" for name, stage in job["stages"].items())
+                            progress.info(f"Processing... {stages}")
+                            if job["status"] in ("succeeded", "failed"):
+                                break
+                            if time.monotonic() > deadline:
+                                failure = f"still running after {JOB_TIMEOUT_SECONDS} seconds"
+                                break
+                            time.sleep(2)
+                        progress.empty()
+                        if failure is not None:
+                            st.error("❌ Lost track of processing: " + failure)
+                        elif job["status"] == "succeeded":
                             st.success("✅ Files uploaded and processed successfully!")
                         else:
-                            st.error("❌ Upload failed: " + response.text)
+                            st.error("❌ Processing failed: " + str(job["error"]))
+                    else:
+                        st.error("❌ Upload failed: " + response.text)
                 except Exception as e:
                     raise TradingBotException(e,sys)
             else:
@@ -136,12 +171,29 @@ if st.button("Ask"):
     if not question.strip():
         st.warning("Please enter a question.")
     else:
-        with st.spinner("Thinking..."):
-            payload = {"question": question}
-            response = requests.post(f"{BASE_URL}/query", json=payload)
-            if response.status_code == 200:
-                answer = response.json().get("answer", "No answer returned.")
-                st.markdown("### 💬 Answer")
-                st.write(answer)
-            else:
-                st.error("❌ Failed to get answer: " + response.text)
\ No newline at end of file
+        payload = {"question": question}
+        response = requests.post(f"{BASE_URL}/query/stream", json=payload, stream=True)
+        if response.status_code == 200:
+            st.markdown("### 💬 Answer")
+            status = st.empty()
+            placeholder = st.empty()
+            answer = ""
+            event = None
+            # Server-Sent Events: "event: <name>" line, then "data: <json>" line
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = json.loads(line[len("data:"):].strip())
+                    if event == "tool_start":
+                        status.info(f"🔧 Using {data['name']}...")
+                    elif event == "tool_end":
+                        status.empty()
+                    elif event == "token":
+                        answer += data["text"]
+                        placeholder.markdown(answer + "▌")
+                    elif event == "error":
+                        st.error("❌ Failed to get answer: " + data["error"])
+            placeholder.markdown(answer or "No answer returned.")
+        else:
+            st.error("❌ Failed to get answer: " + response.text)
\ No newline at end of file
@@ -0,0 +1,63 @@
+import re
+
+from utils.chapter_digests import NUMBER_WORDS, parse_chapter_number
+from utils.keyword_index import tokenize
+
+# A chapter reference inside a question. Unlike CHAPTER_PATTERN it does not capture a title
+# running to the end of the text, so every reference in the question is seen.
+CHAPTER_REFERENCE_PATTERN = re.compile(r"\b(?:chapter|unit)\s+(\w+)\b", re.IGNORECASE)
+
+
+def _question_chapter_number(token: str):
+    """
+    Chapter number written in a question. Unlike headings, questions are free text, so a roman
+    numeral must be uppercase and not a lone "I" ("the chapter I read yesterday").
+    """
+    if token.isalpha() and token.lower() not in NUMBER_WORDS and (not token.isupper() or token == "I"):
+        return None
+    return parse_chapter_number(token)
+
+
+def _title_overlap(question_terms: set, title: str) -> float:
+    title_terms = set(tokenize(title))
+    if not title_terms:
+        return 0.0
+    return len(question_terms & title_terms) / len(title_terms)
+
+
+def find_chapter_digests(question: str, store, min_title_overlap: float) -> list[dict]:
+    """
+    Find the precomputed digests a chapter summary request refers to, either by number
+    ("summarize chapter 3", "chapter three", "unit IV") or by title ("key points of the electrostatics chapter").
+
+    A chapter number found in several sources returns one digest per source; a title must
+    share at least min_title_overlap of its words with the question.
+
+    :return: Matching digests ({"source", "number", "title", "digest"}), empty if none match.
+    """
+    chapters = store.list_chapters()
+    if not chapters:
+        return []
+
+    for match in CHAPTER_REFERENCE_PATTERN.finditer(question):
+        number = _question_chapter_number(match.group(1))
+        if number is not None:
+            matches = [chapter for chapter in chapters if chapter["number"] == number]
+            return [store.get(chapter["source"], number) for chapter in matches]
+
+    question_terms = set(tokenize(question))
+    scored = [(_title_overlap(question_terms, chapter["title"]), chapter) for chapter in chapters]
+    best_score = max(score for score, _ in scored)
+    if best_score < min_title_overlap:
+        return []
+    return [store.get(chapter["source"], chapter["number"]) for score, chapter in scored if score == best_score]
+
+
+def format_chapter_digests(digests: list[dict]) -> str:
+    sections = []
+    for digest in digests:
+        heading = f"Chapter {digest['number']}: {digest['title']}" if digest["title"] else f"Chapter {digest['number']}"
+        if len(digests) > 1:
+            heading += f" ({digest['source']})"
+        sections.append(f"{heading}\n\n{digest['digest']}")
+    return "\n\n".join(sections)
@@ -0,0 +1,81 @@
+import re
+
+from langchain_core.documents import Document
+
+from utils.llm_router import LLMRouter
+from utils.rate_limiter import estimate_tokens
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _strip_overlap(text: str, kept_texts: list[str], probe_size: int = 50) -> str:
+    """
+    Drop the start of text when it repeats the end of a kept chunk (the splitter's chunk_overlap).
+    """
+    probe = text[:probe_size]
+    if len(probe) < probe_size:
+        return text
+    for kept in kept_texts:
+        position = kept.find(probe)
+        while position >= 0:
+            tail = kept[position:]
+            if text.startswith(tail):
+                return text[len(tail):].lstrip()
+            position = kept.find(probe, position + 1)
+    return text
+
+
+def get_context_budget(config: dict, model_name: str) -> int:
+    budgets = config["context"]["max_tokens"]
+    return budgets.get(model_name, config["context"]["default_max_tokens"])
+
+
+def get_llm_context_budget(config: dict, llm) -> int:
+    """
+    Context budget for llm. Any provider of an LLMRouter may answer, so the router gets the smallest of their budgets.
+    """
+    if isinstance(llm, LLMRouter):
+        return min(get_context_budget(config, config["llm"][provider.name]["model_name"]) for provider in llm.providers)
+    return get_context_budget(config, config["llm"]["google"]["model_name"])
+
+
+def build_context(docs: list[Document], max_tokens: int, dedupe_threshold: float = 0.6) -> str:
+    """
+    Turn retrieved chunks into prompt context: best scored first, near-duplicates
+    (shingle Jaccard similarity at or above dedupe_threshold) and repeated chunk
+    overlaps removed, then packed greedily until max_tokens is reached.
+    """
+    # Fused results carry an rrf_score; otherwise keep the retriever's own ranking
+    ranked = sorted(enumerate(docs), key=lambda item: (-item[1].metadata.get("rrf_score", 0.0), item[0]))
+
+    kept_texts, kept_shingles = [], []
+    used_tokens = 0
+    for _, doc in ranked:
+        text = _strip_overlap(doc.page_content.strip(), kept_texts)
+        if not text:
+            continue
+        shingles = _shingles(text)
+        if any(_jaccard(shingles, other) >= dedupe_threshold for other in kept_shingles):
+            continue
+        tokens = estimate_tokens(text)
+        if used_tokens + tokens > max_tokens:
+            # A smaller chunk further down may still fit
+            continue
+        kept_texts.append(text)
+        kept_shingles.append(shingles)
+        used_tokens += tokens
+
+    return "\n\n".join(kept_texts)
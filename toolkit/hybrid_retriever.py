@@ -0,0 +1,72 @@
+import asyncio
+from typing import Any, List
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from dataIngestion.manifest import hash_text
+
+
+def fusion_key(doc: Document) -> tuple:
+    # Chunk IDs are not returned by every vector store, but source and content hash are in the metadata
+    return doc.metadata.get("source"), doc.metadata.get("content_hash") or hash_text(doc.page_content)
+
+
+def reciprocal_rank_fusion(result_lists: list[list[Document]], k: int, rrf_k: int = 60) -> list[Document]:
+    """
+    Merge ranked lists by summing 1 / (rrf_k + rank) per document and return the k best.
+    The fused score is kept in metadata["rrf_score"].
+    """
+    scores, docs = {}, {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = fusion_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [
+        Document(id=docs[key].id, page_content=docs[key].page_content, metadata={**docs[key].metadata, "rrf_score": scores[key]})
+        for key in best
+    ]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense similarity search fused with BM25 keyword search through reciprocal rank fusion.
+
+    Each side returns fetch_k candidates; dense matches below score_threshold are dropped
+    as in the plain retriever. Exact terms, symbols and chapter numbers that embeddings
+    miss are picked up by BM25, so a smaller k keeps the same recall.
+    """
+
+    vector_store: VectorStore
+    keyword_index: Any
+    k: int = 5
+    fetch_k: int = 20
+    score_threshold: float = 0.5
+    rrf_k: int = 60
+
+    def _dense(self, query: str) -> list[Document]:
+        results = self.vector_store.similarity_search_with_relevance_scores(
+            query, k=self.fetch_k, score_threshold=self.score_threshold
+        )
+        return [doc for doc, _ in results]
+
+    def _keyword(self, query: str) -> list[Document]:
+        return [doc for doc, _ in self.keyword_index.search(query, k=self.fetch_k)]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return reciprocal_rank_fusion([self._dense(query), self._keyword(query)], self.k, self.rrf_k)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense, keyword = await asyncio.gather(
+            self.vector_store.asimilarity_search_with_relevance_scores(
+                query, k=self.fetch_k, score_threshold=self.score_threshold
+            ),
+            asyncio.to_thread(self._keyword, query),
+        )
+        return reciprocal_rank_fusion([[doc for doc, _ in dense], keyword], self.k, self.rrf_k)
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, List
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+
+def expand_to_parents(docs: list[Document], docstore, categories: list[str]) -> list[Document]:
+    """
+    Replace summary hits with the raw element they were written from.
+
+    Several chunks of one parent collapse into the parent's first (best ranked) hit.
+    Hits without a stored parent, or whose category is not in `categories`, are kept
+    as they are; images stay summaries because the answer prompts are text only.
+    """
+    parents = docstore.get_many([doc.metadata["parent_id"] for doc in docs if doc.metadata.get("parent_id")])
+    expanded, seen = [], set()
+    for doc in docs:
+        parent_id = doc.metadata.get("parent_id")
+        parent = parents.get(parent_id)
+        if parent is None or parent["category"] not in categories:
+            expanded.append(doc)
+            continue
+        if parent_id in seen:
+            continue
+        seen.add(parent_id)
+        expanded.append(Document(id=parent_id, page_content=parent["content"], metadata={**doc.metadata, "summary": doc.page_content}))
+    return expanded
+
+
+class SmallToBigRetriever(BaseRetriever):
+    """
+    Searches the compact summary vectors with `retriever` and returns the parent raw
+    elements (table HTML, original text) from the docstore.
+    """
+
+    retriever: BaseRetriever
+    docstore: Any
+    categories: List[str]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        docs = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return expand_to_parents(docs, self.docstore, self.categories)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        docs = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        return await asyncio.to_thread(expand_to_parents, docs, self.docstore, self.categories)
@@ -0,0 +1,152 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+from langchain_core.vectorstores import VectorStore
+
+from utils.model_loaders import ModelLoader
+from utils.config_loader import load_config
+from utils.vector_index import load_vector_index, load_vector_store
+from utils.keyword_index import load_keyword_index
+from utils.docstore import load_docstore
+from utils.chapter_digests import load_digest_store
+from utils.question_bank import load_question_bank
+from toolkit.hybrid_retriever import HybridRetriever
+from toolkit.parent_retriever import SmallToBigRetriever
+
+
+class RetrieverRegistry:
+    """
+    Lazily builds and keeps the clients the tools need (Pinecone client, index
+    handle for the configured vector_db backend, embeddings, vector store, retriever and LLM) so every tool call
+    reuses the same objects and their open HTTP connections.
+
+    Every lookup is counted as a hit (object reused) or a build (object created).
+    """
+
+    def __init__(self, config: dict = None, model_loader: ModelLoader = None):
+        self._lock = threading.RLock()
+        self._objects = {}
+        self._stats = {}
+        self.config = config
+        self.model_loader = model_loader
+
+    def replace_with(self, other: "RetrieverRegistry"):
+        """
+        Take over another registry's config, model loader and built objects in one step,
+        so a registry prepared off to the side is only published once it fully built.
+        Callers that already hold an object keep using it until they finish.
+        """
+        with self._lock:
+            self.config = other.config
+            self.model_loader = other.model_loader
+            self._objects = dict(other._objects)
+
+    def _get_config(self) -> dict:
+        if self.config is None:
+            self.config = load_config()
+        return self.config
+
+    def get_config(self) -> dict:
+        return self._get_config()
+
+    def _get_model_loader(self) -> ModelLoader:
+        if self.model_loader is None:
+            self.model_loader = ModelLoader(config=self._get_config())
+        return self.model_loader
+
+    def _count(self, name: str, key: str):
+        counters = self._stats.setdefault(name, {"hits": 0, "builds": 0})
+        counters[key] += 1
+
+    def _get(self, name: str, factory):
+        obj = self._objects.get(name)
+        if obj is None:
+            with self._lock:
+                obj = self._objects.get(name)
+                if obj is None:
+                    obj = factory()
+                    self._objects[name] = obj
+                    self._count(name, "builds")
+                    return obj
+        with self._lock:
+            self._count(name, "hits")
+        return obj
+
+    def get_pinecone_client(self):
+        def build():
+            from pinecone import Pinecone
+            load_dotenv()
+            return Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+        return self._get("pinecone_client", build)
+
+    def get_index(self):
+        def build():
+            config = self._get_config()
+            pinecone_client = self.get_pinecone_client() if config["vector_db"]["backend"] == "pinecone" else None
+            return load_vector_index(config, pinecone_client=pinecone_client)
+        return self._get("index", build)
+
+    def get_embeddings(self):
+        return self._get("embeddings", lambda: self._get_model_loader().load_embeddings())
+
+    def get_llm(self):
+        return self._get("llm", lambda: self._get_model_loader().load_llm())
+
+    def get_vector_store(self) -> VectorStore:
+        return self._get(
+            "vector_store",
+            lambda: load_vector_store(self._get_config(), self.get_index(), self.get_embeddings()),
+        )
+
+    def get_keyword_index(self):
+        return self._get("keyword_index", lambda: load_keyword_index(self._get_config()))
+
+    def get_docstore(self):
+        return self._get("docstore", lambda: load_docstore(self._get_config()))
+
+    def get_digest_store(self):
+        return self._get("digest_store", lambda: load_digest_store(self._get_config()))
+
+    def get_question_bank(self):
+        return self._get("question_bank", lambda: load_question_bank(self._get_config()))
+
+    def get_retriever(self):
+        def build():
+            config = self._get_config()
+            retriever = self._build_base_retriever(config)
+            small_to_big_config = config["retriever"]["small_to_big"]
+            if small_to_big_config["enabled"]:
+                return SmallToBigRetriever(
+                    retriever=retriever,
+                    docstore=self.get_docstore(),
+                    categories=small_to_big_config["expand_categories"],
+                )
+            return retriever
+        return self._get("retriever", build)
+
+    def _build_base_retriever(self, config: dict):
+        hybrid_config = config["retriever"]["hybrid"]
+        if hybrid_config["enabled"]:
+            return HybridRetriever(
+                vector_store=self.get_vector_store(),
+                keyword_index=self.get_keyword_index(),
+                k=config["retriever"]["top_k"],
+                fetch_k=hybrid_config["fetch_k"],
+                score_threshold=config["retriever"]["score_threshold"],
+                rrf_k=hybrid_config["rrf_k"],
+            )
+        return self.get_vector_store().as_retriever(
+            search_type="similarity_score_threshold",
+            search_kwargs={
+                "k": config["retriever"]["top_k"],
+                "score_threshold": config["retriever"]["score_threshold"]
+            }
+        )
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+
+registry = RetrieverRegistry()
@@ -1,91 +1,108 @@
-import os
+import asyncio
 from dotenv import load_dotenv
 from typing import TypedDict
 
 from langchain.tools import tool
 from langchain.prompts import PromptTemplate
 from langchain_core.runnables import RunnableLambda
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone
+from langchain_core.output_parsers import StrOutputParser
 
-from utils.model_loaders import ModelLoader
-from utils.config_loader import load_config
+from toolkit.registry import registry
+from toolkit.context import build_context, get_llm_context_budget
+from toolkit.chapters import CHAPTER_REFERENCE_PATTERN, find_chapter_digests, format_chapter_digests
+from utils.question_bank import chapter_topic, is_format_term, topic_terms
 from data_model.data_models import RagToolSchema
 from prompt.prompt import AnswerQueryTool, GenerateImportantQuestionsTool, SummarizeChapterTool
 
 load_dotenv()
 
-model_loader = ModelLoader()
-config = load_config()
+
+def format_context(docs) -> str:
+    """
+    Deduplicate and pack retrieved chunks into the chat model's context budget.
+    """
+    config = registry.get_config()
+    max_tokens = get_llm_context_budget(config, registry.get_llm())
+    return build_context(docs, max_tokens, config["context"]["dedupe_threshold"])
 
 
 @tool(args_schema=RagToolSchema)
-def answer_query_tool(question: str) -> str:
+async def answer_query_tool(question: str) -> str:
     """Answer user question using textbook content."""
     print("answer query tool node called")
-    pinecone_api_key = os.getenv("PINECONE_API_KEY")
-    pc = Pinecone(api_key=pinecone_api_key)
+    retriever = registry.get_retriever()
 
-    vector_store = PineconeVectorStore(
-        index=pc.Index(config["vector_db"]["index_name"]),
-        embedding=model_loader.load_embeddings()
-    )
+    docs = await retriever.ainvoke(question)
+    context = format_context(docs)
 
-    retriever = vector_store.as_retriever(
-        search_type="similarity_score_threshold",
-        search_kwargs={
-            "k": config["retriever"]["top_k"],
-            "score_threshold": config["retriever"]["score_threshold"]
-        }
-    )
+    prompt = PromptTemplate.from_template(AnswerQueryTool)
+    chain = prompt | registry.get_llm() | StrOutputParser()
 
-    docs = retriever.invoke(question)
-    context = "\n\n".join([doc.page_content for doc in docs])
+    return await chain.ainvoke({"context": context, "question": question})
 
-    prompt = PromptTemplate.from_template(AnswerQueryTool)
-    chain = prompt | model_loader.load_llm()
 
-    return chain.invoke({"context": context, "question": question})
+def resolve_question_topic(question: str, config: dict) -> str:
+    """
+    Bank topic of a question request. A reference to one ingested chapter ("chapter 3")
+    becomes that chapter's topic, so it hits the questions the offline job made for it.
+    Format and count terms ("5 MCQs") are kept, so such requests only share questions of that format.
+    """
+    if config["chapter_digests"]["enabled"]:
+        digests = find_chapter_digests(
+            question, registry.get_digest_store(), config["chapter_digests"]["min_title_overlap"]
+        )
+        if len(digests) == 1:
+            # The chapter number itself is not a count
+            terms = topic_terms(CHAPTER_REFERENCE_PATTERN.sub(" ", question))
+            formats = sorted(term for term in terms if is_format_term(term))
+            return " ".join([chapter_topic(digests[0]), *formats])
+    return question
 
 
 @tool(args_schema=RagToolSchema)
-def generate_important_questions_tool(question: str) -> str:
+async def generate_important_questions_tool(question: str) -> str:
     """Generate exam-style questions from a topic."""
 
     print("generate_important_questions_tool tool node called")
+    config = registry.get_config()
+    bank_config = config["question_bank"]
+    if bank_config["enabled"]:
+        topic = await asyncio.to_thread(resolve_question_topic, question, config)
+        banked = await asyncio.to_thread(registry.get_question_bank().lookup, topic, bank_config["min_similarity"])
+        if banked is not None:
+            return banked["questions"]
+
     prompt = PromptTemplate.from_template(GenerateImportantQuestionsTool)
-    chain = prompt | model_loader.load_llm()
+    chain = prompt | registry.get_llm() | StrOutputParser()
 
-    return chain.invoke({"chapter_or_topic": question})
+    questions = await chain.ainvoke({"chapter_or_topic": question})
+    if bank_config["enabled"]:
+        await asyncio.to_thread(registry.get_question_bank().put, topic, questions, "generated")
+    return questions
 
 
 @tool(args_schema=RagToolSchema)
-def summarize_chapter_tool(question: str) -> str:
+async def summarize_chapter_tool(question: str) -> str:
     """Summarize a physics chapter into key points and formulas."""
 
     print("summarize_chapter_tool tool node called")
-    pinecone_api_key = os.getenv("PINECONE_API_KEY")
-    pc = Pinecone(api_key=pinecone_api_key)
-
-    vector_store = PineconeVectorStore(
-        index=pc.Index(config["vector_db"]["index_name"]),
-        embedding=model_loader.load_embeddings()
-    )
+    digest_config = registry.get_config()["chapter_digests"]
+    if digest_config["enabled"]:
+        # Chapters detected at ingestion are served from their precomputed digest
+        digests = await asyncio.to_thread(
+            find_chapter_digests, question, registry.get_digest_store(), digest_config["min_title_overlap"]
+        )
+        if digests:
+            return format_chapter_digests(digests)
 
-    retriever = vector_store.as_retriever(
-        search_type="similarity_score_threshold",
-        search_kwargs={
-            "k": config["retriever"]["top_k"],
-            "score_threshold": config["retriever"]["score_threshold"]
-        }
-    )
+    retriever = registry.get_retriever()
 
-    docs = retriever.invoke(question)
-    chapter_text = "\n\n".join([doc.page_content for doc in docs])
+    docs = await retriever.ainvoke(question)
+    chapter_text = format_context(docs)
 
     prompt = PromptTemplate.from_template(SummarizeChapterTool)
-    chain = prompt | model_loader.load_llm()
+    chain = prompt | registry.get_llm() | StrOutputParser()
 
-    return chain.invoke({"chapter_text": chapter_text})
+    return await chain.ainvoke({"chapter_text": chapter_text})
 
 
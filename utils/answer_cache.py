@@ -0,0 +1,185 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.chapter_digests import NUMBER_WORDS
+from utils.keyword_index import tokenize
+from utils.sqlite_store import HitCounter, SQLiteStore, shared_store
+
+
+def index_key(config: dict) -> str:
+    """
+    Identity of the vector index a config reads from, e.g. "pinecone:school-chatbot".
+    """
+    return f"{config['vector_db']['backend']}:{config['vector_db']['index_name']}"
+
+
+def question_numbers(question: str) -> tuple:
+    """
+    Numbers in a question, with number words as digits: "chapter three" and "chapter 3" give ("3",).
+    """
+    numbers = set()
+    for token in tokenize(question):
+        if any(char.isdigit() for char in token):
+            numbers.add(token)
+        elif token in NUMBER_WORDS:
+            numbers.add(str(NUMBER_WORDS[token]))
+    return tuple(sorted(numbers))
+
+
+class IndexVersions(SQLiteStore):
+    """
+    Version counter per vector index, kept in SQLite so every server worker and ingestion
+    job sees the same one. Ingestion bumps it whenever it writes to an index, which tells
+    every SemanticAnswerCache built on that index to drop its answers.
+    """
+
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS versions (key TEXT PRIMARY KEY, version INTEGER NOT NULL)",)
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM versions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, key: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO versions (key, version) VALUES (?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET version = version + 1",
+                (key,),
+            )
+            self._conn.commit()
+
+
+def load_index_versions(config: dict) -> IndexVersions:
+    """
+    Return the index version store, shared within the process.
+    """
+    path = config["cache"]["answer"]["versions_path"]
+    return shared_store(path, lambda: IndexVersions(path))
+
+
+class SemanticAnswerCache(HitCounter):
+    """
+    In-memory cache of answers keyed by the embedding of the question.
+
+    A lookup returns the answer of the most similar cached question when its cosine
+    similarity reaches similarity_threshold and both questions contain the same numbers,
+    since "summarize chapter 3" and "summarize chapter 4" embed almost alike. Entries
+    expire after ttl_seconds and the least recently used ones are evicted beyond
+    max_entries. All entries are dropped when the index they were answered from gets
+    new documents, whichever process ingested them.
+    """
+
+    def __init__(self, index_name: str, versions: IndexVersions, similarity_threshold: float = 0.95,
+                 ttl_seconds: float = 86400, max_entries: int = 5000):
+        self.index_name = index_name
+        self.versions = versions
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = versions.get(index_name)
+        # question key -> slot in the vector matrix, oldest use first
+        self._slots = OrderedDict()
+        self._answers = {}
+        self._numbers = {}
+        self._slot_keys = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._vectors = None
+        self._created = np.zeros(max_entries)
+        self._alive = np.zeros(max_entries, dtype=bool)
+
+    @staticmethod
+    def make_key(question: str) -> str:
+        return hashlib.sha256(" ".join(question.lower().split()).encode("utf-8")).hexdigest()
+
+    def _normalize(self, vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self):
+        version = self.versions.get(self.index_name)
+        if version != self._version:
+            self._clear()
+            self._version = version
+
+    def _clear(self):
+        self._slots.clear()
+        self._answers.clear()
+        self._numbers.clear()
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        self._alive[:] = False
+
+    def _remove(self, key: str):
+        slot = self._slots.pop(key)
+        self._answers.pop(key)
+        self._numbers.pop(key)
+        self._alive[slot] = False
+        self._free_slots.append(slot)
+
+    def lookup(self, question: str, vector) -> str:
+        """
+        :return: The cached answer for the closest earlier question with the same numbers, or None.
+        """
+        numbers = question_numbers(question)
+        with self._lock:
+            self._check_version()
+            if not self._slots:
+                self.misses += 1
+                return None
+            expired = self._alive & (time.time() - self._created > self.ttl_seconds)
+            for slot in np.flatnonzero(expired):
+                self._remove(self._slot_keys[slot])
+
+            scores = self._vectors @ self._normalize(vector)
+            scores[~self._alive] = -np.inf
+            candidates = np.flatnonzero(scores >= self.similarity_threshold)
+            for slot in candidates[np.argsort(-scores[candidates])]:
+                key = self._slot_keys[slot]
+                if self._numbers[key] == numbers:
+                    self._slots.move_to_end(key)
+                    self.hits += 1
+                    return self._answers[key]
+            self.misses += 1
+            return None
+
+    @property
+    def version(self) -> int:
+        return self.versions.get(self.index_name)
+
+    def put(self, question: str, vector, answer: str, version: int = None):
+        """
+        :param version: The index version read before the answer was produced. The answer is
+            dropped if documents were ingested since, as it may be stale already.
+        """
+        if not answer:
+            return
+        key = self.make_key(question)
+        vector = self._normalize(vector)
+        with self._lock:
+            self._check_version()
+            if version is not None and version != self._version:
+                return
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            if key in self._slots:
+                self._remove(key)
+            if not self._free_slots:
+                self._remove(next(iter(self._slots)))
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            self._created[slot] = time.time()
+            self._alive[slot] = True
+            self._slots[key] = slot
+            self._slot_keys[slot] = key
+            self._answers[key] = answer
+            self._numbers[key] = question_numbers(question)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._slots), **self.hit_stats()}
@@ -0,0 +1,108 @@
+import re
+
+from utils.sqlite_store import SQLiteStore, index_store_path, shared_store
+
+# "Chapter 3", "CHAPTER 3: Waves", "Unit IV - Electrostatics", "chapter three"
+CHAPTER_PATTERN = re.compile(r"\b(?:chapter|unit)\s+(\d+|[a-z]+)\b[\s:.\-–—]*(.*)", re.IGNORECASE | re.DOTALL)
+NUMBER_WORDS = {
+    word: number for number, word in enumerate(
+        "one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen "
+        "sixteen seventeen eighteen nineteen twenty".split(),
+        start=1,
+    )
+}
+ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100}
+ROMAN_PATTERN = re.compile(r"c{0,3}(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})")
+
+
+def parse_chapter_number(token: str):
+    """
+    Read a chapter number written as digits, a roman numeral or an English word (up to twenty).
+
+    :return: The number, or None if token is not one.
+    """
+    token = token.lower()
+    if token.isdigit():
+        return int(token)
+    if token in NUMBER_WORDS:
+        return NUMBER_WORDS[token]
+    if token and ROMAN_PATTERN.fullmatch(token):
+        total = 0
+        for char, next_char in zip(token, token[1:] + " "):
+            value = ROMAN_VALUES[char]
+            total += -value if value < ROMAN_VALUES.get(next_char, 0) else value
+        return total
+    return None
+
+
+def match_chapter_heading(text: str):
+    """
+    :return: (number, title) if text is a chapter heading, else None.
+    """
+    match = CHAPTER_PATTERN.match(text.strip())
+    if not match:
+        return None
+    number = parse_chapter_number(match.group(1))
+    if number is None:
+        return None
+    return number, " ".join(match.group(2).split())
+
+
+class ChapterDigestStore(SQLiteStore):
+    """
+    SQLite store of the chapter digests built at ingestion, keyed by (source, chapter number).
+    Each digest keeps the hash of the chapter text it was built from so unchanged chapters
+    are not summarized again.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS chapters ("
+        "source TEXT NOT NULL, number INTEGER NOT NULL, title TEXT NOT NULL, digest TEXT NOT NULL, "
+        "content_hash TEXT NOT NULL, PRIMARY KEY (source, number))",
+    )
+
+    def content_hashes(self, source: str) -> dict:
+        """
+        :return: {chapter number: content hash} for the stored chapters of source.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT number, content_hash FROM chapters WHERE source = ?", (source,))
+            return dict(rows.fetchall())
+
+    def replace_source(self, source: str, chapters: list[dict]):
+        """
+        Store the chapters ({"number", "title", "digest", "content_hash"}) of source and drop
+        the ones it no longer has.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM chapters WHERE source = ?", (source,))
+            self._conn.executemany(
+                "INSERT INTO chapters (source, number, title, digest, content_hash) VALUES (?, ?, ?, ?, ?)",
+                [(source, c["number"], c["title"], c["digest"], c["content_hash"]) for c in chapters],
+            )
+            self._conn.commit()
+
+    def get(self, source: str, number: int) -> dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, digest FROM chapters WHERE source = ? AND number = ?", (source, number)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"source": source, "number": number, "title": row[0], "digest": row[1]}
+
+    def list_chapters(self) -> list[dict]:
+        """
+        :return: {"source", "number", "title"} for every stored chapter, without the digests.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT source, number, title FROM chapters ORDER BY source, number").fetchall()
+        return [{"source": source, "number": number, "title": title} for source, number, title in rows]
+
+
+def load_digest_store(config: dict) -> ChapterDigestStore:
+    """
+    Return the chapter digest store for config's vector index, shared within the process.
+    """
+    path = index_store_path(config["chapter_digests"]["path"], config)
+    return shared_store(path, lambda: ChapterDigestStore(path))
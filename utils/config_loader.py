@@ -1,6 +1,16 @@
+import os
 import yaml
 
-def load_config(config_path: str = "D:\\AgenticAI\\AgenticAI projects\\School-chatbot\\config\\config.yaml") -> dict:
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "config", "config.yaml")
+
+def load_config(config_path: str = CONFIG_PATH) -> dict:
     with open(config_path, "r") as file:
         config = yaml.safe_load(file)
-    return config
\ No newline at end of file
+    return config
+
+def resolve_path(path: str) -> str:
+    """
+    Resolve a path from config.yaml; relative paths are taken from the project root.
+    """
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
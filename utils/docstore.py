@@ -0,0 +1,69 @@
+import json
+
+from utils.sqlite_store import SQLiteStore, index_store_path, shared_store
+
+
+class ParentDocStore(SQLiteStore):
+    """
+    SQLite store of the raw partitioned elements (table HTML, text, base64 images) that
+    the indexed summaries were written from, keyed by parent ID.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS parents ("
+        "id TEXT PRIMARY KEY, source TEXT NOT NULL, category TEXT NOT NULL, content TEXT NOT NULL, metadata TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS parents_source ON parents (source)",
+    )
+
+    def put_many(self, records: list[dict]):
+        """
+        Store element records ({"parent_id", "source", "category", "content", "position"}).
+        """
+        if not records:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO parents (id, source, category, content, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (record["parent_id"], record["source"], record["category"], record["content"],
+                     json.dumps({"position": record["position"]}))
+                    for record in records
+                ],
+            )
+            self._conn.commit()
+
+    def get_many(self, ids: list[str]) -> dict:
+        """
+        :return: {parent_id: {"source", "category", "content", **metadata}} for the IDs that are stored.
+        """
+        found = {}
+        unique_ids = list(dict.fromkeys(ids))
+        with self._lock:
+            for start in range(0, len(unique_ids), 500):
+                batch = unique_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT id, source, category, content, metadata FROM parents WHERE id IN ({placeholders})", batch
+                ).fetchall()
+                for parent_id, source, category, content, metadata in rows:
+                    found[parent_id] = {"source": source, "category": category, "content": content, **json.loads(metadata)}
+        return found
+
+    def delete_stale(self, source: str, keep_ids: list[str]):
+        """
+        Delete the parents of source that are not in keep_ids, i.e. elements gone from a re-ingested file.
+        """
+        keep_ids = set(keep_ids)
+        with self._lock:
+            stored = [row[0] for row in self._conn.execute("SELECT id FROM parents WHERE source = ?", (source,))]
+            stale = [(parent_id,) for parent_id in stored if parent_id not in keep_ids]
+            self._conn.executemany("DELETE FROM parents WHERE id = ?", stale)
+            self._conn.commit()
+
+
+def load_docstore(config: dict) -> ParentDocStore:
+    """
+    Return the parent docstore for config's vector index, shared within the process.
+    """
+    path = index_store_path(config["retriever"]["small_to_big"]["docstore_path"], config)
+    return shared_store(path, lambda: ParentDocStore(path))
@@ -0,0 +1,113 @@
+import hashlib
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from utils.sqlite_store import HitCounter, SQLiteStore
+
+
+class EmbeddingCache(SQLiteStore, HitCounter):
+    """
+    Persistent SQLite store of embedding vectors, kept as raw float32 blobs.
+    Keys are sha256 of (embedding model, kind, text); kind separates document and query embeddings.
+    """
+
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)",)
+
+    @staticmethod
+    def make_key(model_name: str, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict:
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return self.hit_stats()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves repeated texts from an EmbeddingCache and embeds
+    the misses in fixed-size batches, several batches at a time.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache,
+                 batch_size: int = 100, max_concurrency: int = 4):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+
+    def _embed_missing(self, texts: list[str], embed_batch) -> list[list[float]]:
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            return embed_batch(batches[0])
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            results = executor.map(embed_batch, batches)
+            return [vector for batch in results for vector in batch]
+
+    def _embed_with_cache(self, texts: list[str], kind: str, embed_batch) -> list[list[float]]:
+        keys = [EmbeddingCache.make_key(self.model_name, kind, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            fresh = dict(zip(missing.keys(), self._embed_missing(list(missing.values()), embed_batch)))
+            self.cache.put_many(fresh)
+            vectors.update({key: np.asarray(vector, dtype=np.float32) for key, vector in fresh.items()})
+
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed_with_cache(texts, "document", self.embeddings.embed_documents)
+
+    def _embed_query_batch(self, texts: list[str]) -> list[list[float]]:
+        # Google embeddings take a task type, so many queries can go out in one request
+        if "task_type" in inspect.signature(self.embeddings.embed_documents).parameters:
+            return self.embeddings.embed_documents(texts, task_type="retrieval_query")
+        return [self.embeddings.embed_query(text) for text in texts]
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed many queries at once, sharing the query cache with embed_query().
+        """
+        return self._embed_with_cache(texts, "query", self._embed_query_batch)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = EmbeddingCache.make_key(self.model_name, "query", text)
+        cached = self.cache.get_many([key])
+        if key in cached:
+            return cached[key].tolist()
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        self.cache.put_many({key: vector})
+        return vector.tolist()
@@ -0,0 +1,121 @@
+import json
+import math
+import re
+from collections import Counter
+
+from langchain_core.documents import Document
+
+from utils.sqlite_store import SQLiteStore, index_store_path, shared_store
+
+# Keeps decimals and powers together ("9.8", "x^2") so formula symbols stay searchable
+TOKEN_PATTERN = re.compile(r"\w+(?:[.^]\w+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "which", "with",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class KeywordIndex(SQLiteStore):
+    """
+    On-disk BM25 inverted index over the same chunks as the vector index, keyed by chunk ID.
+    Postings and chunk texts live in SQLite next to the other local caches.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, length INTEGER NOT NULL, metadata TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL, "
+        "PRIMARY KEY (term, chunk_id))",
+        "CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id)",
+    )
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        super().__init__(path)
+        self.k1 = k1
+        self.b = b
+
+    def add(self, records: list[dict]):
+        """
+        Index chunks given as vector records: {"id", "metadata"} with the chunk text in metadata["text"].
+        """
+        if not records:
+            return
+        with self._lock:
+            self._delete([record["id"] for record in records])
+            chunks, postings = [], []
+            for record in records:
+                counts = Counter(tokenize(record["metadata"].get("text", "")))
+                chunks.append((record["id"], sum(counts.values()), json.dumps(record["metadata"])))
+                postings.extend((term, record["id"], tf) for term, tf in counts.items())
+            self._conn.executemany("INSERT INTO chunks (id, length, metadata) VALUES (?, ?, ?)", chunks)
+            self._conn.executemany("INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", postings)
+            self._conn.commit()
+
+    def _delete(self, ids: list[str]):
+        rows = [(chunk_id,) for chunk_id in ids]
+        self._conn.executemany("DELETE FROM postings WHERE chunk_id = ?", rows)
+        self._conn.executemany("DELETE FROM chunks WHERE id = ?", rows)
+
+    def delete(self, ids: list[str]):
+        if not ids:
+            return
+        with self._lock:
+            self._delete(ids)
+            self._conn.commit()
+
+    def search(self, query: str, k: int = 20) -> list[tuple]:
+        """
+        :return: [(Document, bm25 score)] for the k best matching chunks, best first.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            total, total_length = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks").fetchone()
+            if not total:
+                return []
+            average_length = total_length / total
+
+            scores = {}
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (total - len(rows) + 0.5) / (len(rows) + 0.5))
+                for chunk_id, tf, length in rows:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            if not best:
+                return []
+            placeholders = ",".join("?" * len(best))
+            metadata = dict(self._conn.execute(
+                f"SELECT id, metadata FROM chunks WHERE id IN ({placeholders})", [chunk_id for chunk_id, _ in best]
+            ).fetchall())
+
+        results = []
+        for chunk_id, score in best:
+            chunk_metadata = json.loads(metadata[chunk_id])
+            text = chunk_metadata.pop("text", "")
+            results.append((Document(id=chunk_id, page_content=text, metadata=chunk_metadata), score))
+        return results
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+
+def load_keyword_index(config: dict) -> KeywordIndex:
+    """
+    Return the keyword index for config's vector index, shared within the process like the local vector index.
+    """
+    hybrid_config = config["retriever"]["hybrid"]
+    path = index_store_path(hybrid_config["keyword_index_path"], config)
+    return shared_store(path, lambda: KeywordIndex(path, k1=hybrid_config["bm25_k1"], b=hybrid_config["bm25_b"]))
@@ -0,0 +1,294 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from utils.rate_limiter import is_rate_limit_error
+
+# Members are called without callbacks so only the router's own run shows up in traces and streams
+_SILENT = {"callbacks": []}
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Errors worth sending to another provider: 429s, 5xx responses, timeouts and dropped connections.
+    """
+    if is_rate_limit_error(error):
+        return True
+    for attr in ("status_code", "code", "http_status"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int) and 500 <= status < 600:
+            return True
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return type(error).__name__ in (
+        "InternalServerError", "ServiceUnavailable", "ServerError", "DeadlineExceeded",
+        "APIConnectionError", "APITimeoutError", "APIStatusError",
+    )
+
+
+class ProviderHealth:
+    """
+    Rolling latency and error samples of one provider over the last window_seconds.
+
+    A provider is unhealthy while it cools down after a 429/5xx, or when its error rate
+    over at least min_samples calls exceeds max_error_rate.
+    """
+
+    def __init__(self, window_seconds: float, min_samples: int, max_error_rate: float, cooldown_seconds: float):
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.cooldown_seconds = cooldown_seconds
+        self._samples = deque()
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "errors": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0}
+
+    def _trim(self, now: float):
+        while self._samples and self._samples[0][0] < now - self.window_seconds:
+            self._samples.popleft()
+
+    def record(self, latency: float, ok: bool):
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, latency, ok))
+            self._trim(now)
+            self.counters["calls"] += 1
+            if not ok:
+                self.counters["errors"] += 1
+                self._cooldown_until = now + self.cooldown_seconds
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def snapshot(self) -> dict:
+        """
+        :return: {"p50", "p95" (None until a call succeeded), "error_rate", "samples", "healthy"}
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            latencies = sorted(latency for _, latency, ok in self._samples if ok)
+            samples = len(self._samples)
+            errors = sum(1 for _, _, ok in self._samples if not ok)
+            cooling_down = now < self._cooldown_until
+        error_rate = errors / samples if samples else 0.0
+
+        def percentile(share: float):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(share * len(latencies)))]
+
+        return {
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "error_rate": round(error_rate, 3),
+            "samples": samples,
+            "healthy": not cooling_down and (samples < self.min_samples or error_rate <= self.max_error_rate),
+        }
+
+
+class LLMProvider:
+    """
+    One pooled chat model client and its health. Binding tools gives a new LLMProvider that shares the health.
+    """
+
+    def __init__(self, name: str, model, health: ProviderHealth):
+        self.name = name
+        self.model = model
+        self.health = health
+
+    def with_model(self, model) -> "LLMProvider":
+        return LLMProvider(self.name, model, self.health)
+
+
+class LLMRouter(BaseChatModel):
+    """
+    Chat model that sends each call to the fastest healthy provider of a pool.
+
+    Providers are ranked healthy first, then by rolling p50 latency; providers with no
+    successful call yet keep their configured order, so each gets measured. A 429, 5xx or
+    timeout fails over to the next provider. When hedging is on and the first provider
+    has not answered (or streamed its first token) within its p95 latency, the next one
+    is started as well and the first to answer wins. The loser is cancelled and its elapsed
+    time kept as a latency sample: a lower bound, but enough to rank a provider that was
+    beaten behind the one that beat it. Other errors are raised as they are.
+
+    Latency is measured to the full answer, or to the first token for streamed calls.
+    """
+
+    providers: List[Any]
+    hedge: bool = True
+    hedge_min_delay: float = 2.0
+    hedge_default_delay: float = 8.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm-router"
+
+    def bind_tools(self, tools, **kwargs):
+        """
+        Bind tools on every member that supports tool calling; the others are left out of the bound pool.
+        """
+        providers = []
+        for provider in self.providers:
+            try:
+                model = provider.model.bind_tools(tools, **kwargs)
+            except (AttributeError, NotImplementedError) as e:
+                print(f"[WARN] LLM provider {provider.name} cannot bind tools, leaving it out: {e}")
+                continue
+            providers.append(provider.with_model(model))
+        if not providers:
+            raise ValueError("No LLM provider in the pool supports tool calling")
+        return self.model_copy(update={"providers": providers})
+
+    def ranked_providers(self) -> list:
+        snapshots = {provider.name: provider.health.snapshot() for provider in self.providers}
+
+        def rank(item):
+            position, provider = item
+            snapshot = snapshots[provider.name]
+            return (not snapshot["healthy"], snapshot["p50"] or 0.0, position)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=rank)]
+
+    def _hedge_delay(self, provider: LLMProvider) -> Optional[float]:
+        if not self.hedge:
+            return None
+        p95 = provider.health.snapshot()["p95"]
+        return max(self.hedge_min_delay, p95) if p95 is not None else self.hedge_default_delay
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Synchronous callers only get failover; hedging needs the event loop
+        error = None
+        for provider in self.ranked_providers():
+            if error is not None:
+                provider.health.count("failovers")
+            start = time.monotonic()
+            try:
+                message = provider.model.invoke(messages, config=_SILENT, stop=stop, **kwargs)
+            except Exception as e:
+                if not is_retryable_error(e):
+                    raise
+                provider.health.record(time.monotonic() - start, ok=False)
+                print(f"[WARN] LLM provider {provider.name} failed, trying the next one: {e}")
+                error = e
+                continue
+            provider.health.record(time.monotonic() - start, ok=True)
+            return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"provider": provider.name})
+        raise error
+
+    async def _race(self, start_call):
+        """
+        Run start_call(provider) on the ranked providers with failover and hedging.
+
+        :param start_call: Async callable(provider) returning the provider's result.
+        :return: (provider, result) of the first provider that succeeded.
+        """
+        queue = deque(self.ranked_providers())
+        running = {}
+        error = None
+
+        def launch(reason: str = None):
+            provider = queue.popleft()
+            if reason:
+                provider.health.count(reason)
+            task = asyncio.ensure_future(start_call(provider))
+            running[task] = (provider, time.monotonic(), reason == "hedges")
+
+        launch()
+        try:
+            while running:
+                timeout = None
+                if queue and len(running) == 1:
+                    provider, started, _ = next(iter(running.values()))
+                    delay = self._hedge_delay(provider)
+                    if delay is not None:
+                        timeout = max(0.0, started + delay - time.monotonic())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch("hedges")
+                    continue
+                for task in done:
+                    provider, started, hedged = running.pop(task)
+                    latency = time.monotonic() - started
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        if not is_retryable_error(e):
+                            raise
+                        provider.health.record(latency, ok=False)
+                        print(f"[WARN] LLM provider {provider.name} failed, trying the next one: {e}")
+                        error = e
+                        if queue and not running:
+                            launch("failovers")
+                        continue
+                    provider.health.record(latency, ok=True)
+                    if hedged:
+                        provider.health.count("hedge_wins")
+                    return provider, result
+        finally:
+            now = time.monotonic()
+            for task, (provider, started, _) in running.items():
+                task.cancel()
+                provider.health.record(now - started, ok=True)
+        raise error
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async def call(provider):
+            return await provider.model.ainvoke(messages, config=_SILENT, stop=stop, **kwargs)
+
+        provider, message = await self._race(call)
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"provider": provider.name})
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async def first_chunk(provider):
+            stream = provider.model.astream(messages, config=_SILENT, stop=stop, **kwargs)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+
+        # Failover and hedging apply until the first token; after that the winner streams alone
+        _, (stream, chunk) = await self._race(first_chunk)
+        try:
+            while chunk is not None:
+                generation = ChatGenerationChunk(message=chunk)
+                if run_manager:
+                    await run_manager.on_llm_new_token(generation.text, chunk=generation)
+                yield generation
+                chunk = await stream.__anext__()
+        except StopAsyncIteration:
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            provider.name: {**provider.health.snapshot(), **provider.health.counters}
+            for provider in self.providers
+        }
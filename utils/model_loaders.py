@@ -4,17 +4,20 @@ from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
 from utils.config_loader import load_config
-from langchain.chat_models import ChatOpenAI  # Or use any other provider you're working with
+from utils.embedding_cache import CachedEmbeddings, EmbeddingCache
+from utils.llm_router import LLMProvider, LLMRouter, ProviderHealth
+
+PROVIDER_API_KEYS = {"google": "GOOGLE_API_KEY", "groq": "GROQ_API_KEY", "openai": "OPENAI_API_KEY"}
 
 
 class ModelLoader:
     """
     A utility class to load embedding models and LLM models.
     """
-    def __init__(self):
+    def __init__(self, config: dict = None):
         load_dotenv()
         self._validate_env()
-        self.config=load_config()
+        self.config = config if config is not None else load_config()
 
     def _validate_env(self):
         """
@@ -31,7 +34,18 @@ class ModelLoader:
         """
         print("Loading Embedding model")
         model_name=self.config["embedding_model"]["model_name"]
-        return GoogleGenerativeAIEmbeddings(model=model_name)
+        embeddings = GoogleGenerativeAIEmbeddings(model=model_name)
+
+        cache_config = self.config["cache"]["embedding"]
+        if not cache_config["enabled"]:
+            return embeddings
+        return CachedEmbeddings(
+            embeddings,
+            model_name=model_name,
+            cache=EmbeddingCache(cache_config["path"]),
+            batch_size=cache_config["batch_size"],
+            max_concurrency=cache_config["max_concurrency"],
+        )
 
     def load_chat_model(self, provider: str = "google"):
         """
@@ -58,6 +72,13 @@ class ModelLoader:
                 api_key=os.getenv("GROQ_API_KEY")
             )
 
+        elif provider == "openai":
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(
+                model=model_name,
+                api_key=os.getenv("OPENAI_API_KEY")
+            )
+
         else:
             raise ValueError(f"Unsupported LLM provider: {provider}")
 
@@ -65,10 +86,38 @@ class ModelLoader:
 
     def load_llm(self):
         """
-        Load and return the LLM model.
+        Load and return the LLM model: with llm_router enabled, a pool of every configured
+        provider that has an API key, otherwise Gemini.
         """
         print("LLM loading...")
+        router_config = self.config["llm_router"]
+        if router_config["enabled"]:
+            return self.load_llm_router(router_config)
         model_name=self.config["llm"]["google"]["model_name"]
         gemini_model=ChatGoogleGenerativeAI(model=model_name)
         
-        return gemini_model  # Placeholder for future LLM loading
\ No newline at end of file
+        return gemini_model  # Placeholder for future LLM loading
+
+    def load_llm_router(self, router_config: dict) -> LLMRouter:
+        """
+        Build the latency-aware LLM pool from config['llm_router'].
+        """
+        providers = []
+        for provider in router_config["providers"]:
+            if not os.getenv(PROVIDER_API_KEYS[provider]):
+                print(f"[INFO] Skipping LLM provider {provider}: {PROVIDER_API_KEYS[provider]} is not set")
+                continue
+            health = ProviderHealth(
+                window_seconds=router_config["window_seconds"],
+                min_samples=router_config["min_samples"],
+                max_error_rate=router_config["max_error_rate"],
+                cooldown_seconds=router_config["cooldown_seconds"],
+            )
+            providers.append(LLMProvider(provider, self.load_chat_model(provider), health))
+        hedge_config = router_config["hedge"]
+        return LLMRouter(
+            providers=providers,
+            hedge=hedge_config["enabled"],
+            hedge_min_delay=hedge_config["min_delay_seconds"],
+            hedge_default_delay=hedge_config["default_delay_seconds"],
+        )
@@ -0,0 +1,74 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from utils.config_loader import resolve_path
+from utils.sqlite_store import HitCounter
+
+
+class PartitionCache(HitCounter):
+    """
+    On-disk cache of partition output: one gzipped JSON list of element records per
+    (file hash, partition settings), so the same PDF is never parsed twice.
+
+    The least recently used files are removed once the cache exceeds max_size_mb.
+    """
+
+    def __init__(self, path: str, max_size_mb: float = 2048):
+        self.path = resolve_path(path)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(file_hash: str, settings: dict) -> str:
+        return hashlib.sha256(f"{file_hash}\0{json.dumps(settings, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json.gz")
+
+    def get(self, key: str) -> list:
+        """
+        :return: The cached records, or None.
+        """
+        path = self._file(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                records = json.load(file)
+        except (FileNotFoundError, EOFError, OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        # Touch the file so eviction treats it as recently used
+        os.utime(path)
+        with self._lock:
+            self.hits += 1
+        return records
+
+    def put(self, key: str, records: list):
+        path = self._file(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as file:
+            json.dump(records, file)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith(".json.gz"):
+                stat = os.stat(os.path.join(self.path, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.path, name))
+            total -= size
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return self.hit_stats()
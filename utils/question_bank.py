@@ -0,0 +1,129 @@
+import time
+
+from utils.chapter_digests import NUMBER_WORDS
+from utils.keyword_index import tokenize
+from utils.sqlite_store import HitCounter, SQLiteStore, index_store_path, shared_store
+
+# Words that phrase the request rather than name the topic
+REQUEST_WORDS = {
+    "about", "board", "can", "chapter", "create", "exam", "expected", "generate", "give", "important",
+    "list", "make", "me", "most", "please", "possible", "practice", "prepare", "question", "questions",
+    "sample", "some", "topic", "unit", "write", "you",
+}
+# Words that ask for a question format; they stay in the key and must match exactly, like counts
+FORMAT_WORDS = {"long", "mark", "mcq", "objective", "quiz", "short", "test"}
+
+
+def topic_terms(text: str) -> set:
+    """
+    Content words of a topic, with simple plurals folded ("waves" -> "wave").
+    """
+    terms = set()
+    for token in tokenize(text):
+        if token in REQUEST_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.add(token)
+    return terms
+
+
+def is_format_term(term: str) -> bool:
+    return term.isdigit() or term in NUMBER_WORDS or term in FORMAT_WORDS
+
+
+def topic_key(text: str) -> str:
+    """
+    Normalized bank key: sorted topic and format terms, so word order and request phrasing do not matter.
+    """
+    return " ".join(sorted(topic_terms(text)))
+
+
+def chapter_topic(chapter: dict) -> str:
+    """
+    Bank topic of a chapter: its title, or "Chapter N" when no title was detected.
+    """
+    return chapter["title"] or f"Chapter {chapter['number']}"
+
+
+class QuestionBank(SQLiteStore, HitCounter):
+    """
+    SQLite bank of generated exam questions keyed by normalized topic.
+
+    Filled ahead of time from the chapter digests (dataIngestion.question_bank_job) and
+    by the questions tool whenever it had to generate for a topic the bank did not have.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS topics ("
+        "key TEXT PRIMARY KEY, topic TEXT NOT NULL, questions TEXT NOT NULL, origin TEXT NOT NULL, "
+        "created_at REAL NOT NULL)",
+    )
+
+    def put(self, topic: str, questions: str, origin: str):
+        """
+        :param origin: "offline" for the batch job, "generated" for questions made on request.
+        """
+        key = topic_key(topic)
+        if not key:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO topics (key, topic, questions, origin, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, topic, questions, origin, time.time()),
+            )
+            self._conn.commit()
+
+    def has(self, topic: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM topics WHERE key = ?", (topic_key(topic),)).fetchone() is not None
+
+    def lookup(self, topic: str, min_similarity: float) -> dict:
+        """
+        Find the banked topic matching topic: the same normalized key, or else the key with the
+        same format terms (counts, "mcq", "short", ...) and the highest Jaccard similarity of the
+        other terms, if it reaches min_similarity.
+
+        :return: {"topic", "questions", "origin"}, or None.
+        """
+        key = topic_key(topic)
+        if not key:
+            return None
+        terms = set(key.split())
+        formats = {term for term in terms if is_format_term(term)}
+        terms -= formats
+        with self._lock:
+            row = self._conn.execute("SELECT key FROM topics WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                best_key, best_score = None, 0.0
+                for (other_key,) in self._conn.execute("SELECT key FROM topics"):
+                    other_terms = set(other_key.split())
+                    other_formats = {term for term in other_terms if is_format_term(term)}
+                    other_terms -= other_formats
+                    if other_formats != formats or not terms | other_terms:
+                        continue
+                    score = len(terms & other_terms) / len(terms | other_terms)
+                    if score > best_score:
+                        best_key, best_score = other_key, score
+                row = (best_key,) if best_score >= min_similarity else None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            topic, questions, origin = self._conn.execute(
+                "SELECT topic, questions, origin FROM topics WHERE key = ?", row
+            ).fetchone()
+        return {"topic": topic, "questions": questions, "origin": origin}
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            topics = self._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
+            return {"topics": topics, **self.hit_stats()}
+
+
+def load_question_bank(config: dict) -> QuestionBank:
+    """
+    Return the question bank for config's vector index, shared within the process.
+    """
+    path = index_store_path(config["question_bank"]["path"], config)
+    return shared_store(path, lambda: QuestionBank(path))
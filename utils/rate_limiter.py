@@ -0,0 +1,186 @@
+import random
+import threading
+import time
+
+from utils.config_loader import load_config
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Best-effort detection of a 429 / quota error across provider SDKs.
+    """
+    for attr in ("status_code", "code", "http_status"):
+        if getattr(error, attr, None) == 429:
+            return True
+    if type(error).__name__ in ("ResourceExhausted", "RateLimitError", "TooManyRequests"):
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "resource exhausted" in message
+
+
+def estimate_tokens(payload) -> int:
+    """
+    Rough token estimate (~4 characters per token) for prompts, messages or message lists.
+    Image parts are counted at a flat 258 tokens, which is what Gemini bills per image.
+    """
+    if isinstance(payload, str):
+        return max(1, len(payload) // 4)
+    if isinstance(payload, dict):
+        if payload.get("type") == "image_url":
+            return 258
+        return sum(estimate_tokens(value) for value in payload.values())
+    if isinstance(payload, (list, tuple)):
+        return sum(estimate_tokens(item) for item in payload) or 1
+    if hasattr(payload, "to_messages"):
+        return estimate_tokens(payload.to_messages())
+    if hasattr(payload, "content"):
+        return estimate_tokens(payload.content)
+    return max(1, len(str(payload)) // 4)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that refills `capacity` units every `period` seconds.
+
+    reserve() takes the units straight away (the balance may go negative) and
+    returns how long the caller must wait, so concurrent callers queue up
+    fairly instead of all waking up at the same moment.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, delta: float):
+        """
+        Correct the balance once the real cost is known (positive delta = more was used).
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= delta
+
+
+class ProviderRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one provider/model,
+    with jittered exponential backoff when the provider answers 429.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int,
+                 max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "tokens": 0, "rate_limited": 0, "waited_seconds": 0.0}
+
+    def acquire(self, tokens: int = 1):
+        wait = max(
+            self.requests.reserve(1),
+            self.tokens.reserve(tokens),
+            self._paused_until - time.monotonic(),
+        )
+        if wait > 0:
+            with self._lock:
+                self.stats["waited_seconds"] += wait
+            time.sleep(wait)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(delay / 2, delay)
+        with self._lock:
+            self.stats["rate_limited"] += 1
+            # Pause every caller sharing this quota, not only the one that got the 429
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def _record_usage(self, estimated: int, response):
+        usage = getattr(response, "usage_metadata", None) or {}
+        actual = usage.get("total_tokens") if isinstance(usage, dict) else None
+        if actual:
+            self.tokens.adjust(actual - estimated)
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["tokens"] += actual or estimated
+
+    def invoke(self, model, payload, config=None):
+        """
+        Call model.invoke(payload) under the limits, retrying on 429 with backoff.
+        """
+        estimated = estimate_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated)
+            try:
+                response = model.invoke(payload, config)
+            except Exception as e:
+                if attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"[WARN] {self.name} rate limited, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                continue
+            self._record_usage(estimated, response)
+            return response
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+class RateLimiterRegistry:
+    """
+    One shared ProviderRateLimiter per (provider, model), configured from config['rate_limits'].
+    """
+
+    def __init__(self, config: dict = None):
+        self._config = config
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def _get_config(self) -> dict:
+        if self._config is None:
+            self._config = load_config()["rate_limits"]
+        return self._config
+
+    def get(self, provider: str, model_name: str) -> ProviderRateLimiter:
+        key = (provider, model_name)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                config = self._get_config()
+                limits = config.get("models", {}).get(provider, {}).get(model_name) or config["default"]
+                backoff = config["backoff"]
+                limiter = ProviderRateLimiter(
+                    name=f"{provider}/{model_name}",
+                    requests_per_minute=limits["requests_per_minute"],
+                    tokens_per_minute=limits["tokens_per_minute"],
+                    max_retries=backoff["max_retries"],
+                    base_delay=backoff["base_delay"],
+                    max_delay=backoff["max_delay"],
+                )
+                self._limiters[key] = limiter
+            return limiter
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {limiter.name: limiter.get_stats() for limiter in self._limiters.values()}
+
+
+rate_limiters = RateLimiterRegistry()
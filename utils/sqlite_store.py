@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import threading
+
+from utils.config_loader import resolve_path
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite file shared by threads (callers serialize access with their own lock),
+    in WAL mode so readers in other processes are not blocked by writes.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class SQLiteStore:
+    """
+    Base of the local SQLite caches and stores: one connection guarded by self._lock.
+    Subclasses list their CREATE statements in SCHEMA.
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, path: str):
+        self.path = resolve_path(path)
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(self.path)
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class HitCounter:
+    """
+    Hit and miss counts of a cache; the cache updates them under its own lock.
+    """
+
+    hits = 0
+    misses = 0
+
+    def hit_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def index_store_path(directory: str, config: dict) -> str:
+    """
+    :return: Path of the SQLite file kept in directory for config's vector index.
+    """
+    return os.path.join(resolve_path(directory), f"{config['vector_db']['index_name']}.sqlite")
+
+
+_shared_stores = {}
+_shared_stores_lock = threading.Lock()
+
+
+def shared_store(path: str, factory):
+    """
+    Return the store opened at path, creating it with factory() the first time, so every
+    user in the process shares one connection and lock per file.
+    """
+    with _shared_stores_lock:
+        store = _shared_stores.get(path)
+        if store is None:
+            store = factory()
+            _shared_stores[path] = store
+        return store
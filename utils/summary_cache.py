@@ -0,0 +1,88 @@
+import hashlib
+import time
+
+from utils.config_loader import load_config
+from utils.sqlite_store import HitCounter, SQLiteStore
+
+
+class SummaryCache(SQLiteStore, HitCounter):
+    """
+    Persistent SQLite cache of LLM summaries keyed by hash of (model, prompt, content).
+
+    Least recently used entries are evicted once the stored summaries exceed max_size_mb.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS summaries ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed)",
+    )
+
+    def __init__(self, path: str = None, max_size_mb: float = None):
+        if path is None or max_size_mb is None:
+            config = load_config()["cache"]["summary"]
+            path = path or config["path"]
+            max_size_mb = max_size_mb or config["max_size_mb"]
+        super().__init__(path)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+
+    @staticmethod
+    def make_key(model_name: str, prompt_template: str, content: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model_name, prompt_template, content):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict:
+        """
+        Return {key: summary} for the keys that are cached and mark them as recently used.
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM summaries WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE summaries SET accessed = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                [(key, value, len(value.encode("utf-8")), now) for key, value in items.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so we do not evict again on the very next insert
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM summaries ORDER BY accessed"):
+            stale.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM summaries WHERE key = ?", stale)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return self.hit_stats()
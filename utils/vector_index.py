@@ -0,0 +1,306 @@
+import json
+import os
+import threading
+from typing import Iterable, List, Optional
+from uuid import uuid4
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from utils.config_loader import resolve_path
+from utils.sqlite_store import connect_sqlite, shared_store
+
+
+class LocalVectorIndex:
+    """
+    In-process cosine index: a memory-mapped float32 matrix of unit vectors plus a
+    SQLite table mapping each vector ID to its row and metadata.
+
+    Exposes the same upsert(vectors=[{"id", "values", "metadata"}]) / delete(ids=[...])
+    calls as a Pinecone index, so ingestion can write to either. Searches are exact
+    NumPy dot products up to exact_search_limit vectors and go through an HNSW index
+    (hnswlib) above that. The files are only safe to share within one process.
+    """
+
+    def __init__(self, path: str, dimension: int, exact_search_limit: int = 50000,
+                 hnsw_ef_construction: int = 200, hnsw_m: int = 16, hnsw_ef_search: int = 64):
+        self.path = resolve_path(path)
+        self.dimension = dimension
+        self.exact_search_limit = exact_search_limit
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+        os.makedirs(self.path, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = connect_sqlite(os.path.join(self.path, "rows.sqlite"))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rows (id TEXT PRIMARY KEY, row INTEGER NOT NULL, metadata TEXT NOT NULL)")
+        self._conn.commit()
+
+        self._matrix_path = os.path.join(self.path, "vectors.f32")
+        rows = self._conn.execute("SELECT id, row FROM rows").fetchall()
+        self._row_ids = {row: vector_id for vector_id, row in rows}
+        self._next_row = max(self._row_ids, default=-1) + 1
+        # Rows freed by deletes are reused by later upserts
+        self._free_rows = sorted(set(range(self._next_row)) - set(self._row_ids), reverse=True)
+        self._matrix = None
+        file_rows = os.path.getsize(self._matrix_path) // (dimension * 4) if os.path.exists(self._matrix_path) else 0
+        self._open_matrix(max(self._next_row, file_rows, 1024))
+        self._alive = np.zeros(len(self._matrix), dtype=bool)
+        self._alive[list(self._row_ids)] = True
+        self._hnsw = None
+
+    def _open_matrix(self, capacity: int):
+        size = capacity * self.dimension * 4
+        if not os.path.exists(self._matrix_path) or os.path.getsize(self._matrix_path) < size:
+            with open(self._matrix_path, "ab") as file:
+                file.truncate(size)
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def _ensure_capacity(self, rows: int):
+        capacity = len(self._matrix)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        self._open_matrix(capacity)
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+
+    def _normalize(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def upsert(self, vectors: list[dict]):
+        if not vectors:
+            return
+        with self._lock:
+            existing = dict(self._fetch_rows([item["id"] for item in vectors]))
+            rows = []
+            for item in vectors:
+                row = existing.get(item["id"])
+                if row is None:
+                    row = self._free_rows.pop() if self._free_rows else self._next_row
+                    self._next_row = max(self._next_row, row + 1)
+                    existing[item["id"]] = row
+                rows.append(row)
+
+            self._ensure_capacity(self._next_row)
+            values = self._normalize([item["values"] for item in vectors])
+            self._matrix[rows] = values
+            self._matrix.flush()
+            self._alive[rows] = True
+            for item, row in zip(vectors, rows):
+                self._row_ids[row] = item["id"]
+            if self._hnsw is not None:
+                # Labels are row numbers, so re-adding a reused row updates that point in place
+                self._hnsw.add_items(values, rows)
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (id, row, metadata) VALUES (?, ?, ?)",
+                [(item["id"], row, json.dumps(item.get("metadata", {}))) for item, row in zip(vectors, rows)],
+            )
+            self._conn.commit()
+
+    def delete(self, ids: list[str]):
+        if not ids:
+            return
+        with self._lock:
+            rows = [row for _, row in self._fetch_rows(ids)]
+            self._alive[rows] = False
+            for row in rows:
+                del self._row_ids[row]
+                self._free_rows.append(row)
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(row)
+            self._conn.executemany("DELETE FROM rows WHERE id = ?", [(vector_id,) for vector_id in ids])
+            self._conn.commit()
+
+    def _fetch_rows(self, ids: list[str]) -> list[tuple]:
+        found = []
+        unique_ids = list(dict.fromkeys(ids))
+        for start in range(0, len(unique_ids), 500):
+            batch = unique_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            found.extend(self._conn.execute(f"SELECT id, row FROM rows WHERE id IN ({placeholders})", batch).fetchall())
+        return found
+
+    def _fetch_metadata(self, rows: list[int]) -> dict:
+        found = {}
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row, metadata in self._conn.execute(
+                f"SELECT row, metadata FROM rows WHERE row IN ({placeholders})", batch
+            ):
+                found[row] = json.loads(metadata)
+        return found
+
+    def _build_hnsw(self):
+        """
+        Build the HNSW graph over the live rows, or return None when hnswlib is not installed.
+        """
+        try:
+            import hnswlib
+        except ImportError:
+            print("[WARN] hnswlib is not installed, local vector index falls back to exact search")
+            self.exact_search_limit = float("inf")
+            return None
+        hnsw = hnswlib.Index(space="ip", dim=self.dimension)
+        hnsw.init_index(max_elements=len(self._matrix), ef_construction=self.hnsw_ef_construction,
+                        M=self.hnsw_m)
+        hnsw.set_ef(self.hnsw_ef_search)
+        rows = np.flatnonzero(self._alive)
+        if len(rows):
+            hnsw.add_items(self._matrix[rows], rows)
+        print(f"[INFO] Built HNSW index over {len(rows)} vectors")
+        return hnsw
+
+    def _search_rows(self, query: np.ndarray, k: int) -> list[tuple]:
+        if len(self._row_ids) > self.exact_search_limit:
+            if self._hnsw is None:
+                self._hnsw = self._build_hnsw()
+            if self._hnsw is not None:
+                labels, distances = self._hnsw.knn_query(query, k=min(k, len(self._row_ids)))
+                # hnswlib's "ip" distance is 1 - dot product
+                return [(int(row), 1.0 - float(distance)) for row, distance in zip(labels[0], distances[0])]
+
+        scores = self._matrix[:self._next_row] @ query[0]
+        scores[~self._alive[:self._next_row]] = -np.inf
+        k = min(k, len(self._row_ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = sorted(top, key=lambda row: -scores[row])
+        return [(int(row), float(scores[row])) for row in top]
+
+    def query(self, vector: list[float], top_k: int = 4) -> list[tuple]:
+        """
+        :return: [(id, cosine similarity, metadata)] for the top_k most similar vectors, best first.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            if not self._row_ids:
+                return []
+            matches = self._search_rows(query, top_k)
+            metadata = self._fetch_metadata([row for row, _ in matches])
+            return [(self._row_ids[row], score, metadata[row]) for row, score in matches if row in self._row_ids]
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._row_ids)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    LangChain vector store over a LocalVectorIndex. Like PineconeVectorStore, the chunk
+    text is kept in the "text" metadata field and relevance scores are (cosine + 1) / 2.
+    """
+
+    def __init__(self, index: LocalVectorIndex, embedding: Embeddings, text_key: str = "text"):
+        self.index = index
+        self._embedding = embedding
+        self.text_key = text_key
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid4()) for _ in texts]
+        vectors = self._embedding.embed_documents(texts)
+        self.index.upsert(vectors=[
+            {"id": vector_id, "values": vector, "metadata": {**metadata, self.text_key: text}}
+            for vector_id, vector, text, metadata in zip(ids, vectors, texts, metadatas)
+        ])
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs) -> Optional[bool]:
+        self.index.delete(ids=ids or [])
+        return True
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> list[tuple]:
+        results = []
+        for vector_id, score, metadata in self.index.query(embedding, top_k=k):
+            metadata = dict(metadata)
+            text = metadata.pop(self.text_key, "")
+            results.append((Document(id=vector_id, page_content=text, metadata=metadata), score))
+        return results
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list[tuple]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   index: LocalVectorIndex = None, **kwargs) -> "LocalVectorStore":
+        if index is None:
+            raise ValueError("LocalVectorStore.from_texts needs an `index`.")
+        store = cls(index=index, embedding=embedding)
+        store.add_texts(texts, metadatas=metadatas, **kwargs)
+        return store
+
+
+def load_vector_index(config: dict, pinecone_client=None):
+    """
+    Return the index handle for config['vector_db']['backend'].
+
+    Local indexes are shared per path within the process, so the ingestion jobs
+    and the query tools read and write the same matrix.
+    """
+    db_config = config["vector_db"]
+    backend = db_config["backend"]
+    index_name = db_config["index_name"]
+
+    if backend == "pinecone":
+        from pinecone import ServerlessSpec
+        pinecone_config = db_config["pinecone"]
+        if index_name not in [i.name for i in pinecone_client.list_indexes()]:
+            pinecone_client.create_index(
+                name=index_name,
+                dimension=db_config["dimension"],
+                metric="cosine",
+                spec=ServerlessSpec(cloud=pinecone_config["cloud"], region=pinecone_config["region"]),
+            )
+        return pinecone_client.Index(index_name)
+
+    elif backend == "local":
+        local_config = db_config["local"]
+        path = os.path.join(resolve_path(local_config["path"]), index_name)
+        return shared_store(path, lambda: LocalVectorIndex(
+            path,
+            dimension=db_config["dimension"],
+            exact_search_limit=local_config["exact_search_limit"],
+            hnsw_ef_construction=local_config["hnsw"]["ef_construction"],
+            hnsw_m=local_config["hnsw"]["m"],
+            hnsw_ef_search=local_config["hnsw"]["ef_search"],
+        ))
+
+    else:
+        raise ValueError(f"Unsupported vector_db backend: {backend}")
+
+
+def load_vector_store(config: dict, index, embeddings: Embeddings) -> VectorStore:
+    backend = config["vector_db"]["backend"]
+    if backend == "pinecone":
+        from langchain_pinecone import PineconeVectorStore
+        return PineconeVectorStore(index=index, embedding=embeddings)
+    elif backend == "local":
+        return LocalVectorStore(index=index, embedding=embeddings)
+    else:
+        raise ValueError(f"Unsupported vector_db backend: {backend}")